@@ -21,6 +21,7 @@ from flask import Flask
 from flask_cors import CORS
 from models import db
 from config import Config
+from services import FileService
 from controllers.material_controller import material_bp, material_global_bp
 from controllers.reference_file_controller import reference_file_bp
 from controllers.settings_controller import settings_bp
@@ -55,6 +56,9 @@ def create_app():
     # Load configuration from Config class
     app.config.from_object(Config)
     
+    # JSON 响应保持 to_dict 中的键顺序，省去每次序列化时对所有嵌套 dict 排序
+    app.json.sort_keys = False
+    
     # Override with environment-specific paths (use absolute path)
     backend_dir = os.path.dirname(os.path.abspath(__file__))
     instance_dir = os.path.join(backend_dir, 'instance')
@@ -97,6 +101,8 @@ def create_app():
     CORS(app, origins=cors_origins)
     # Database migrations (Alembic via Flask-Migrate)
     Migrate(app, db)
+    # 应用级 FileService 单例（控制器通过 get_file_service() 获取）
+    app.extensions['file_service'] = FileService(app.config['UPLOAD_FOLDER'])
     
     # Register blueprints
     app.register_blueprint(project_bp)
@@ -126,12 +132,11 @@ def create_app():
         获取用户的输出语言偏好（从数据库 Settings 读取）
         返回: zh, ja, en, auto
         """
-        from models import Settings
+        from models.settings_cache import get_cached_settings
         try:
-            settings = Settings.get_settings()
-            return {'data': {'language': settings.output_language}}
+            return {'data': {'language': get_cached_settings()['output_language']}}
         except SQLAlchemyError as db_error:
-            logging.warning(f"Failed to load output language from settings: {db_error}")
+            logging.warning("Failed to load output language from settings: %s", db_error)
             return {'data': {'language': Config.OUTPUT_LANGUAGE}}  # 默认中文
 
     # Root endpoint
@@ -26,13 +26,18 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
     # SQLite线程安全配置 - 关键修复
+    # 连接池参数只在这里配置（models 中的 db 不再单独设置）
     SQLALCHEMY_ENGINE_OPTIONS = {
         'connect_args': {
             'check_same_thread': False,  # 允许跨线程使用（仅SQLite）
-            'timeout': 30  # 增加超时时间
+            'timeout': 30  # 数据库锁定超时（秒）
         },
-        'pool_pre_ping': True,  # 连接前检查
-        'pool_recycle': 3600,  # 1小时回收连接
+        'pool_pre_ping': True,  # 连接前检查，确保连接有效
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '3600')),  # 回收连接的秒数，释放文件句柄
+        # 后台描述/图片/解析线程各自持有会话，池需容纳它们加上并发请求
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '10')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '20')),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', '30')),  # 获取连接的超时时间（秒）
     }
     
     # 文件存储配置
@@ -76,6 +81,8 @@ class Config:
     # 并发配置
     MAX_DESCRIPTION_WORKERS = int(os.getenv('MAX_DESCRIPTION_WORKERS', '5'))
     MAX_IMAGE_WORKERS = int(os.getenv('MAX_IMAGE_WORKERS', '8'))
+    MAX_PARSE_WORKERS = int(os.getenv('MAX_PARSE_WORKERS', '4'))  # 参考文件解析线程数
+    MAX_PENDING_PARSE_TASKS = int(os.getenv('MAX_PENDING_PARSE_TASKS', '32'))  # 排队+运行中的解析任务上限，超出返回 429
     
     # 图片生成配置
     DEFAULT_ASPECT_RATIO = "16:9"
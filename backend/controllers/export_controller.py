@@ -11,7 +11,7 @@ from utils import (
     error_response, not_found, bad_request, success_response,
     parse_page_ids_from_query, parse_page_ids_from_body, get_filtered_pages
 )
-from services import ExportService, FileService
+from services import ExportService, get_file_service
 from services.ai_service_manager import get_ai_service
 
 logger = logging.getLogger(__name__)
@@ -39,7 +39,7 @@ def export_pptx(project_id):
         }
     """
     try:
-        project = Project.query.get(project_id)
+        project = db.session.get(Project, project_id)
         
         if not project:
             return not_found('Project')
@@ -55,7 +55,7 @@ def export_pptx(project_id):
             return bad_request("No pages found for project")
         
         # Get image paths
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
+        file_service = get_file_service()
         
         image_paths = []
         for page in pages:
@@ -67,7 +67,7 @@ def export_pptx(project_id):
             return bad_request("No generated images found for project")
         
         # Determine export directory and filename
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
+        file_service = get_file_service()
         exports_dir = file_service._get_exports_dir(project_id)
         
         # Get filename from query params or use default
@@ -117,7 +117,7 @@ def export_pdf(project_id):
         }
     """
     try:
-        project = Project.query.get(project_id)
+        project = db.session.get(Project, project_id)
         
         if not project:
             return not_found('Project')
@@ -130,7 +130,7 @@ def export_pdf(project_id):
             return bad_request("No pages found for project")
         
         # Get image paths
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
+        file_service = get_file_service()
         
         image_paths = []
         for page in pages:
@@ -209,7 +209,7 @@ def export_editable_pptx(project_id):
     轮询 /api/projects/{project_id}/tasks/{task_id} 获取进度和下载链接
     """
     try:
-        project = Project.query.get(project_id)
+        project = db.session.get(Project, project_id)
         
         if not project:
             return not_found('Project')
@@ -260,10 +260,9 @@ def export_editable_pptx(project_id):
         logger.info(f"Created export task {task.id} for project {project_id} (recursive analysis: depth={max_depth}, workers={max_workers})")
         
         # Get services
-        from services.file_service import FileService
         from services.task_manager import task_manager, export_editable_pptx_with_recursive_analysis_task
         
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
+        file_service = get_file_service()
         
         # Get Flask app instance for background task
         app = current_app._get_current_object()
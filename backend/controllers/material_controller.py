@@ -4,7 +4,7 @@ Material Controller - handles standalone material image generation
 from flask import Blueprint, request, current_app
 from models import db, Project, Material, Task
 from utils import success_response, error_response, not_found, bad_request
-from services import FileService
+from services import get_file_service
 from services.ai_service_manager import get_ai_service
 from services.task_manager import task_manager, generate_material_image_task
 from pathlib import Path
@@ -30,7 +30,7 @@ def _build_material_query(filter_project_id: str):
     if filter_project_id == 'none':
         return query.filter(Material.project_id.is_(None)), None
 
-    project = Project.query.get(filter_project_id)
+    project = db.session.get(Project, filter_project_id)
     if not project:
         return None, not_found('Project')
 
@@ -87,7 +87,7 @@ def _resolve_target_project_id(raw_project_id: Optional[str], allow_none: bool =
         return None, bad_request("project_id cannot be 'all' when uploading materials")
 
     if raw_project_id:
-        project = Project.query.get(raw_project_id)
+        project = db.session.get(Project, raw_project_id)
         if not project:
             return None, not_found('Project')
 
@@ -104,7 +104,7 @@ def _save_material_file(file, target_project_id: Optional[str]):
     if file_ext not in ALLOWED_MATERIAL_EXTENSIONS:
         return None, bad_request(f"Unsupported file type. Allowed: {', '.join(sorted(ALLOWED_MATERIAL_EXTENSIONS))}")
 
-    file_service = FileService(current_app.config['UPLOAD_FOLDER'])
+    file_service = get_file_service()
     if target_project_id:
         materials_dir = file_service._get_materials_dir(target_project_id)
     else:
@@ -155,7 +155,7 @@ def generate_material_image(project_id):
     try:
         # 支持 'none' 作为特殊值，表示生成全局素材
         if project_id != 'none':
-            project = Project.query.get(project_id)
+            project = db.session.get(Project, project_id)
             if not project:
                 return not_found('Project')
         else:
@@ -183,13 +183,13 @@ def generate_material_image(project_id):
         
         # 验证project_id（如果不是'global'）
         if task_project_id != 'global':
-            project = Project.query.get(task_project_id)
+            project = db.session.get(Project, task_project_id)
             if not project:
                 return not_found('Project')
 
         # Initialize services
         ai_service = get_ai_service()
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
+        file_service = get_file_service()
 
         # 创建临时目录保存参考图片（后台任务会清理）
         temp_dir = Path(tempfile.mkdtemp(dir=current_app.config['UPLOAD_FOLDER']))
@@ -353,11 +353,11 @@ def delete_material(material_id):
     DELETE /api/materials/{material_id} - Delete a material and its file
     """
     try:
-        material = Material.query.get(material_id)
+        material = db.session.get(Material, material_id)
         if not material:
             return not_found('Material')
 
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
+        file_service = get_file_service()
         material_path = Path(file_service.get_absolute_path(material.relative_path))
 
         # First, delete the database record to ensure data consistency
@@ -404,7 +404,7 @@ def associate_materials_to_project():
             return bad_request("material_urls must be a non-empty array")
         
         # Validate project exists
-        project = Project.query.get(project_id)
+        project = db.session.get(Project, project_id)
         if not project:
             return not_found('Project')
         
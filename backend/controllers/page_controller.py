@@ -5,7 +5,7 @@ import logging
 from flask import Blueprint, request, current_app
 from models import db, Project, Page, PageImageVersion, Task
 from utils import success_response, error_response, not_found, bad_request
-from services import FileService, ProjectContext
+from services import ProjectContext, get_file_service
 from services.ai_service_manager import get_ai_service
 from services.task_manager import task_manager, generate_single_page_image_task, edit_page_image_task
 from datetime import datetime
@@ -33,12 +33,12 @@ def create_page(project_id):
     }
     """
     try:
-        project = Project.query.get(project_id)
+        project = db.session.get(Project, project_id)
         
         if not project:
             return not_found('Project')
         
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
         if not data or 'order_index' not in data:
             return bad_request("order_index is required")
@@ -82,20 +82,20 @@ def delete_page(project_id, page_id):
     DELETE /api/projects/{project_id}/pages/{page_id} - Delete page
     """
     try:
-        page = Page.query.get(page_id)
+        page = db.session.get(Page, page_id)
         
         if not page or page.project_id != project_id:
             return not_found('Page')
         
         # Delete page image if exists
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
+        file_service = get_file_service()
         file_service.delete_page_image(project_id, page_id)
         
         # Delete page
         db.session.delete(page)
         
         # Update project
-        project = Project.query.get(project_id)
+        project = db.session.get(Project, project_id)
         if project:
             project.updated_at = datetime.utcnow()
         
@@ -119,12 +119,12 @@ def update_page_outline(project_id, page_id):
     }
     """
     try:
-        page = Page.query.get(page_id)
+        page = db.session.get(Page, page_id)
         
         if not page or page.project_id != project_id:
             return not_found('Page')
         
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
         if not data or 'outline_content' not in data:
             return bad_request("outline_content is required")
@@ -133,7 +133,7 @@ def update_page_outline(project_id, page_id):
         page.updated_at = datetime.utcnow()
         
         # Update project
-        project = Project.query.get(project_id)
+        project = db.session.get(Project, project_id)
         if project:
             project.updated_at = datetime.utcnow()
         
@@ -161,12 +161,12 @@ def update_page_description(project_id, page_id):
     }
     """
     try:
-        page = Page.query.get(page_id)
+        page = db.session.get(Page, page_id)
         
         if not page or page.project_id != project_id:
             return not_found('Page')
         
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
         if not data or 'description_content' not in data:
             return bad_request("description_content is required")
@@ -175,7 +175,7 @@ def update_page_description(project_id, page_id):
         page.updated_at = datetime.utcnow()
         
         # Update project
-        project = Project.query.get(project_id)
+        project = db.session.get(Project, project_id)
         if project:
             project.updated_at = datetime.utcnow()
         
@@ -199,12 +199,12 @@ def generate_page_description(project_id, page_id):
     }
     """
     try:
-        page = Page.query.get(page_id)
+        page = db.session.get(Page, page_id)
         
         if not page or page.project_id != project_id:
             return not_found('Page')
         
-        project = Project.query.get(project_id)
+        project = db.session.get(Project, project_id)
         if not project:
             return not_found('Project')
         
@@ -284,12 +284,12 @@ def generate_page_image(project_id, page_id):
     }
     """
     try:
-        page = Page.query.get(page_id)
+        page = db.session.get(Page, page_id)
         
         if not page or page.project_id != project_id:
             return not_found('Page')
         
-        project = Project.query.get(project_id)
+        project = db.session.get(Project, project_id)
         if not project:
             return not_found('Project')
         
@@ -358,7 +358,7 @@ def generate_page_image(project_id, page_id):
         # Initialize services
         ai_service = get_ai_service()
         
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
+        file_service = get_file_service()
         
         # Get template path
         ref_image_path = None
@@ -471,7 +471,7 @@ def edit_page_image(project_id, page_id):
     - context_images: file uploads (multiple files with key "context_images")
     """
     try:
-        page = Page.query.get(page_id)
+        page = db.session.get(Page, page_id)
         
         if not page or page.project_id != project_id:
             return not_found('Page')
@@ -479,14 +479,14 @@ def edit_page_image(project_id, page_id):
         if not page.generated_image_path:
             return bad_request("Page must have generated image first")
         
-        project = Project.query.get(project_id)
+        project = db.session.get(Project, project_id)
         if not project:
             return not_found('Project')
         
         # Initialize services
         ai_service = get_ai_service()
         
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
+        file_service = get_file_service()
         
         # Parse request data (support both JSON and multipart/form-data)
         if request.is_json:
@@ -629,7 +629,7 @@ def get_page_image_versions(project_id, page_id):
     GET /api/projects/{project_id}/pages/{page_id}/image-versions - Get all image versions for a page
     """
     try:
-        page = Page.query.get(page_id)
+        page = db.session.get(Page, page_id)
         
         if not page or page.project_id != project_id:
             return not_found('Page')
@@ -638,7 +638,7 @@ def get_page_image_versions(project_id, page_id):
             .order_by(PageImageVersion.version_number.desc()).all()
         
         return success_response({
-            'versions': [v.to_dict() for v in versions]
+            'versions': [v.to_dict(project_id) for v in versions]
         })
     
     except Exception as e:
@@ -652,12 +652,12 @@ def set_current_image_version(project_id, page_id, version_id):
     Set a specific version as the current one
     """
     try:
-        page = Page.query.get(page_id)
+        page = db.session.get(Page, page_id)
         
         if not page or page.project_id != project_id:
             return not_found('Page')
         
-        version = PageImageVersion.query.get(version_id)
+        version = db.session.get(PageImageVersion, version_id)
         
         if not version or version.page_id != page_id:
             return not_found('Image Version')
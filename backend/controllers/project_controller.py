@@ -8,7 +8,7 @@ from datetime import datetime
 
 from flask import Blueprint, request, jsonify, current_app
 from sqlalchemy import desc
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
 from werkzeug.exceptions import BadRequest
 
 from models import db, Project, Page, Task, ReferenceFile
@@ -134,8 +134,10 @@ def list_projects():
         
         # Fetch limit + 1 items to check for more pages efficiently
         # This avoids a second database query
+        # 页面用 selectinload 单独一次 IN 查询加载：joinedload 配合 limit/offset 会把项目查询
+        # 包成子查询，并为每个页面重复传输项目行
         projects_with_extra = Project.query\
-            .options(joinedload(Project.pages))\
+            .options(selectinload(Project.pages))\
             .order_by(desc(Project.updated_at))\
             .limit(limit + 1)\
             .offset(offset)\
@@ -173,7 +175,7 @@ def create_project():
     }
     """
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
         if not data:
             return bad_request("Request body is required")
@@ -316,14 +318,18 @@ def delete_project(project_id):
     DELETE /api/projects/{project_id} - Delete project
     """
     try:
-        project = Project.query.get(project_id)
+        # 预先批量加载页面及其图片版本，级联删除时不再逐页查询
+        project = db.session.get(
+            Project, project_id,
+            options=[selectinload(Project.pages).selectinload(Page.image_versions)]
+        )
         
         if not project:
             return not_found('Project')
         
         # Delete project files
-        from services import FileService
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
+        from services import get_file_service
+        file_service = get_file_service()
         file_service.delete_project_files(project_id)
         
         # Delete project from database (cascade will delete pages and tasks)
@@ -353,7 +359,7 @@ def generate_outline(project_id):
     }
     """
     try:
-        project = Project.query.get(project_id)
+        project = db.session.get(Project, project_id)
         
         if not project:
             return not_found('Project')
@@ -404,7 +410,7 @@ def generate_outline(project_id):
         
         # Delete existing pages (using ORM session to trigger cascades)
         # Note: Cannot use bulk delete as it bypasses ORM cascades for PageImageVersion
-        old_pages = Page.query.filter_by(project_id=project_id).all()
+        old_pages = Page.query.options(selectinload(Page.image_versions)).filter_by(project_id=project_id).all()
         for old_page in old_pages:
             db.session.delete(old_page)
         
@@ -463,7 +469,7 @@ def generate_from_description(project_id):
     """
     
     try:
-        project = Project.query.get(project_id)
+        project = db.session.get(Project, project_id)
         
         if not project:
             return not_found('Project')
@@ -511,7 +517,7 @@ def generate_from_description(project_id):
             page_descriptions = page_descriptions[:min_count]
         
         # Step 4: Delete existing pages (using ORM session to trigger cascades)
-        old_pages = Page.query.filter_by(project_id=project_id).all()
+        old_pages = Page.query.options(selectinload(Page.image_versions)).filter_by(project_id=project_id).all()
         for old_page in old_pages:
             db.session.delete(old_page)
         
@@ -573,7 +579,7 @@ def generate_descriptions(project_id):
     }
     """
     try:
-        project = Project.query.get(project_id)
+        project = db.session.get(Project, project_id)
         
         if not project:
             return not_found('Project')
@@ -666,7 +672,7 @@ def generate_images(project_id):
     }
     """
     try:
-        project = Project.query.get(project_id)
+        project = db.session.get(Project, project_id)
         
         if not project:
             return not_found('Project')
@@ -712,8 +718,8 @@ def generate_images(project_id):
         # Get singleton AI service instance
         ai_service = get_ai_service()
         
-        from services import FileService
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
+        from services import get_file_service
+        file_service = get_file_service()
         
         # 合并额外要求和风格描述
         combined_requirements = project.extra_requirements or ""
@@ -764,7 +770,7 @@ def get_task_status(project_id, task_id):
     GET /api/projects/{project_id}/tasks/{task_id} - Get task status
     """
     try:
-        task = Task.query.get(task_id)
+        task = db.session.get(Task, task_id)
         
         if not task or task.project_id != project_id:
             return not_found('Task')
@@ -788,12 +794,12 @@ def refine_outline(project_id):
     }
     """
     try:
-        project = Project.query.get(project_id)
+        project = db.session.get(Project, project_id)
         
         if not project:
             return not_found('Project')
         
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
         if not data or not data.get('user_requirement'):
             return bad_request("user_requirement is required")
@@ -846,7 +852,8 @@ def refine_outline(project_id):
         pages_data = ai_service.flatten_outline(refined_outline)
         
         # 在删除旧页面之前，先保存已有的页面描述（按标题匹配）
-        old_pages = Page.query.filter_by(project_id=project_id).order_by(Page.order_index).all()
+        old_pages = Page.query.options(selectinload(Page.image_versions))\
+            .filter_by(project_id=project_id).order_by(Page.order_index).all()
         descriptions_map = {}  # {title: description_content}
         old_status_map = {}  # {title: status} 用于保留状态
         
@@ -942,12 +949,12 @@ def refine_descriptions(project_id):
     }
     """
     try:
-        project = Project.query.get(project_id)
+        project = db.session.get(Project, project_id)
         
         if not project:
             return not_found('Project')
         
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
         if not data or not data.get('user_requirement'):
             return bad_request("user_requirement is required")
@@ -1,26 +1,90 @@
 """
 Reference File Controller - handles file upload and parsing
 """
-import os
+import hashlib
+import json
 import logging
+import os
 import re
+import threading
+import time
 import uuid
-from flask import Blueprint, request, current_app
-from werkzeug.utils import secure_filename
+from flask import Blueprint, Response, request, current_app, stream_with_context
+from sqlalchemy import update
+from sqlalchemy.orm import defer
 from pathlib import Path
 from config import Config
 from datetime import datetime
+from typing import Tuple
 from urllib.parse import unquote
-import threading
 
 from models import db, ReferenceFile, Project
-from utils.response import success_response, error_response, bad_request, not_found
+from utils.response import success_response, error_response, bad_request, not_found, rate_limit_error
+from utils.file_type_utils import verify_file_signature
 from services.file_parser_service import FileParserService
+from services.task_manager import parse_task_manager, cleanup_task_manager, delete_file_task
 
 logger = logging.getLogger(__name__)
 
 reference_file_bp = Blueprint('reference_file', __name__)
 
+# Content-Disposition filename parameters, compiled once at import.
+# RFC 5987 form: filename*=UTF-8''%E6%96%87%E4%BB%B6.pdf (checked first, carries non-ASCII names)
+_FILENAME_EXT_RE = re.compile(r"filename\*\s*=\s*([\w!#$%&+^`{}~-]+)'[^']*'([^;\s]+)", re.IGNORECASE)
+# Plain form: filename="file.pdf" or filename=file.pdf
+_FILENAME_RE = re.compile(r'filename\s*=\s*(([\'"]).*?\2|[^;\n]*)', re.IGNORECASE)
+
+# 解析状态变化的进程内通知；多进程部署时其他进程的变化由 SSE 定时回查数据库兜底
+_parse_status_changed = threading.Condition()
+_SSE_RECHECK_INTERVAL = 2  # 两次回查数据库之间的最长等待（秒）
+_SSE_KEEPALIVE_INTERVAL = 15  # 无事件时发送保活注释的间隔（秒）
+_SSE_MAX_LIFETIME = 600  # 单个连接的最长存活时间（秒），到期后由客户端重连
+
+# 按存储文件分段加锁：同一内容哈希的上传（复用磁盘文件）与后台删除互斥。
+# 这些锁只在当前进程内有效；多进程部署时无法跨进程互斥，
+# 极端情况下文件可能在另一进程复用后被删除，需由共享存储层面的锁或引用计数兜底
+_STORED_FILE_LOCKS = tuple(threading.Lock() for _ in range(64))
+
+# 列表接口按 id 游标分页时的默认/最大页大小
+_DEFAULT_PAGE_SIZE = 50
+_MAX_PAGE_SIZE = 200
+
+# 列表接口不返回 markdown_content，查询时直接跳过该大字段，避免逐行加载整篇解析结果
+_LIST_QUERY_OPTIONS = (defer(ReferenceFile.markdown_content),)
+
+
+def _notify_parse_status_changed():
+    """Wake up SSE streams waiting for a parse status change in this process"""
+    with _parse_status_changed:
+        _parse_status_changed.notify_all()
+
+
+def _stored_file_lock(relative_path: str) -> threading.Lock:
+    """Get the lock guarding reuse and removal of one stored reference file"""
+    return _STORED_FILE_LOCKS[hash(relative_path) % len(_STORED_FILE_LOCKS)]
+
+
+def _delete_stored_file_async(task_id: str, relative_path: str, app):
+    """
+    Remove a stored reference file from disk once no record references it
+    
+    Args:
+        task_id: Task identifier (used only for tracking)
+        relative_path: File path relative to UPLOAD_FOLDER, as stored in ReferenceFile.file_path
+        app: Flask app instance (for app context)
+    """
+    with app.app_context():
+        # 内容相同的上传共用一个磁盘文件：在删除前一刻、持有与上传相同的锁再确认一次，
+        # 避免期间新上传的记录复用了这个文件
+        with _stored_file_lock(relative_path):
+            still_referenced = db.session.query(
+                ReferenceFile.query.filter_by(file_path=relative_path).exists()
+            ).scalar()
+            if still_referenced:
+                logger.info(f"Stored file still referenced, keeping it: {relative_path}")
+                return
+            delete_file_task(task_id, str(Path(app.config['UPLOAD_FOLDER']) / relative_path))
+
 
 def _allowed_file(filename: str, allowed_extensions: set) -> bool:
     """Check if file extension is allowed"""
@@ -35,6 +99,43 @@ def _get_file_type(filename: str) -> str:
     return 'unknown'
 
 
+def _filename_from_content_disposition(content_disposition: str):
+    """Extract the filename from a Content-Disposition header, preferring the RFC 5987 form"""
+    match = _FILENAME_EXT_RE.search(content_disposition)
+    if match:
+        charset, encoded_name = match.groups()
+        try:
+            return unquote(encoded_name, encoding=charset)
+        except LookupError:
+            return unquote(encoded_name)
+    
+    match = _FILENAME_RE.search(content_disposition)
+    if match:
+        # Decode if URL encoded
+        return unquote(match.group(1).strip('"\''))
+    return None
+
+
+def _save_upload_stream(stream, dest: Path, chunk_size: int = 1 << 20) -> Tuple[int, str]:
+    """
+    Stream an uploaded file to disk in chunks
+    
+    Returns:
+        Tuple of (bytes written, SHA-256 hex digest of the content)
+    """
+    written = 0
+    digest = hashlib.sha256()
+    with open(dest, 'wb') as out:
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            out.write(chunk)
+            written += len(chunk)
+    return written, digest.hexdigest()
+
+
 def _parse_file_async(file_id: str, file_path: str, filename: str, app):
     """
     Parse file asynchronously in background
@@ -47,14 +148,12 @@ def _parse_file_async(file_id: str, file_path: str, filename: str, app):
     """
     with app.app_context():
         try:
-            reference_file = ReferenceFile.query.get(file_id)
+            reference_file = db.session.get(ReferenceFile, file_id)
             if not reference_file:
                 logger.error(f"Reference file {file_id} not found")
                 return
             
-            # Update status to parsing
-            reference_file.parse_status = 'parsing'
-            db.session.commit()
+            # 状态已由 trigger_file_parse 置为 parsing，这里只在解析结束时提交一次结果
             
             # Initialize parser service
             parser = FileParserService(
@@ -92,7 +191,7 @@ def _parse_file_async(file_id: str, file_path: str, filename: str, app):
         except Exception as e:
             logger.error(f"Error in async file parsing: {str(e)}", exc_info=True)
             try:
-                reference_file = ReferenceFile.query.get(file_id)
+                reference_file = db.session.get(ReferenceFile, file_id)
                 if reference_file:
                     reference_file.parse_status = 'failed'
                     reference_file.error_message = f"Parsing error: {str(e)}"
@@ -100,6 +199,9 @@ def _parse_file_async(file_id: str, file_path: str, filename: str, app):
                     db.session.commit()
             except Exception as db_error:
                 logger.error(f"Failed to update error status: {str(db_error)}")
+        finally:
+            # 唤醒等待该状态变化的 SSE 连接
+            _notify_parse_status_changed()
 
 
 @reference_file_bp.route('/upload', methods=['POST'])
@@ -127,14 +229,7 @@ def upload_reference_file():
             # Try to get filename from Content-Disposition header
             content_disposition = request.headers.get('Content-Disposition', '')
             if content_disposition:
-                filename_match = re.search(r'filename[^;=\n]*=(([\'"]).*?\2|[^;\n]*)', content_disposition)
-                if filename_match:
-                    original_filename = filename_match.group(1).strip('"\'')
-                    # Decode if URL encoded
-                    try:
-                        original_filename = unquote(original_filename)
-                    except:
-                        pass
+                original_filename = _filename_from_content_disposition(content_disposition)
         
         if not original_filename or original_filename == '':
             return bad_request("No file selected or filename could not be determined")
@@ -147,56 +242,69 @@ def upload_reference_file():
         if not _allowed_file(original_filename, allowed_extensions):
             return bad_request(f"File type not allowed. Allowed types: {', '.join(allowed_extensions)}")
         
+        # Verify the content matches the extension by sniffing only the file header,
+        # so disguised or corrupted files never reach disk or the parser
+        file_type = _get_file_type(original_filename)
+        if not verify_file_signature(file.stream, file_type):
+            return bad_request(f"File content does not match its .{file_type} extension")
+        
         # Get project_id (optional)
         project_id = request.form.get('project_id')
         if project_id == 'none' or not project_id:
             project_id = None
         else:
             # Verify project exists
-            project = Project.query.get(project_id)
+            project = db.session.get(Project, project_id)
             if not project:
                 return not_found('Project')
         
-        # Secure filename for filesystem (but keep original for database)
-        # secure_filename removes non-ASCII chars, so we need to handle Chinese characters
-        filename = secure_filename(original_filename)
-        
-        # If secure_filename removed everything (e.g., all Chinese chars), use a fallback
-        if not filename or filename == '':
-            # Extract extension from original filename
-            ext = _get_file_type(original_filename)
-            if ext == 'unknown':
-                ext = 'file'
-            filename = f"file_{uuid.uuid4().hex[:8]}.{ext}"
-            logger.warning(f"Original filename '{original_filename}' was sanitized to '{filename}'")
-        
         # Create upload directory structure
         upload_folder = current_app.config['UPLOAD_FOLDER']
         reference_files_dir = Path(upload_folder) / 'reference_files'
         reference_files_dir.mkdir(parents=True, exist_ok=True)
         
-        # Generate unique filename to avoid conflicts
-        unique_id = str(uuid.uuid4())[:8]
-        file_type = _get_file_type(original_filename)  # Use original filename for type detection
-        unique_filename = f"{unique_id}_{filename}"
-        file_path = reference_files_dir / unique_filename
-        
-        # Save file
-        file.save(str(file_path))
-        file_size = os.path.getsize(file_path)
-        
-        # Create database record
-        reference_file = ReferenceFile(
-            project_id=project_id,
-            filename=original_filename,
-            file_path=str(file_path.relative_to(upload_folder)),
-            file_size=file_size,
-            file_type=file_type,
-            parse_status='pending'
-        )
+        # Save file - 先写入临时文件，边写边统计字节数并计算 SHA-256
+        temp_path = reference_files_dir / f".upload_{uuid.uuid4().hex}.part"
+        try:
+            file_size, content_hash = _save_upload_stream(file.stream, temp_path)
+        except Exception:
+            temp_path.unlink(missing_ok=True)
+            raise
         
-        db.session.add(reference_file)
-        db.session.commit()
+        # 磁盘文件以内容哈希命名：内容相同的上传共用同一个文件，原始文件名只保存在数据库中
+        file_path = reference_files_dir / f"{content_hash}.{file_type}"
+        relative_path = str(file_path.relative_to(upload_folder))
+        
+        # 复用文件到记录提交之间持有锁，后台删除任务不会在此期间删掉该文件
+        with _stored_file_lock(relative_path):
+            if file_path.exists():
+                temp_path.unlink()
+                logger.info(f"Duplicate upload content, reusing stored file: {file_path.name}")
+            else:
+                os.replace(temp_path, file_path)
+            
+            # Create database record
+            reference_file = ReferenceFile(
+                project_id=project_id,
+                filename=original_filename,
+                file_path=relative_path,
+                file_size=file_size,
+                file_type=file_type,
+                content_hash=content_hash,
+                parse_status='pending'
+            )
+            
+            # 相同内容已解析完成时直接复用解析结果，无需再次调用 MinerU
+            parsed_duplicate = ReferenceFile.query.filter_by(
+                content_hash=content_hash, parse_status='completed'
+            ).first()
+            if parsed_duplicate:
+                reference_file.parse_status = 'completed'
+                reference_file.markdown_content = parsed_duplicate.markdown_content
+                reference_file.mineru_batch_id = parsed_duplicate.mineru_batch_id
+            
+            db.session.add(reference_file)
+            db.session.commit()
         
         logger.info(f"File uploaded: {original_filename} (ID: {reference_file.id})")
         
@@ -219,12 +327,21 @@ def get_reference_file(file_id):
         Reference file information including parse status
     """
     try:
-        reference_file = ReferenceFile.query.get(file_id)
+        reference_file = db.session.get(ReferenceFile, file_id)
         if not reference_file:
             return not_found('Reference file')
         
+        # 前端解析期间会轮询该接口：内容未变化时直接返回 304，跳过 to_dict 和 markdown_content 序列化
+        etag = f"{reference_file.updated_at.timestamp():.6f}-{reference_file.parse_status}"
+        if request.if_none_match.contains_weak(etag):
+            response = current_app.response_class(status=304)
+            response.set_etag(etag, weak=True)
+            return response
+        
         # 单个文件查询时包含内容和失败计数（会在 to_dict 中根据状态判断是否计算）
-        return success_response({'file': reference_file.to_dict(include_content=True, include_failed_count=True)})
+        response, status_code = success_response({'file': reference_file.to_dict(include_content=True, include_failed_count=True)})
+        response.set_etag(etag, weak=True)
+        return response, status_code
         
     except Exception as e:
         logger.error(f"Error getting reference file: {str(e)}", exc_info=True)
@@ -240,24 +357,24 @@ def delete_reference_file(file_id):
         Success message
     """
     try:
-        reference_file = ReferenceFile.query.get(file_id)
+        reference_file = db.session.get(ReferenceFile, file_id)
         if not reference_file:
             return not_found('Reference file')
         
-        # Delete file from disk
-        try:
-            upload_folder = current_app.config['UPLOAD_FOLDER']
-            file_path = Path(upload_folder) / reference_file.file_path
-            if file_path.exists():
-                file_path.unlink()
-                logger.info(f"Deleted file from disk: {file_path}")
-        except Exception as e:
-            logger.warning(f"Failed to delete file from disk: {str(e)}")
+        # 在删除数据库记录前记下磁盘路径
+        relative_path = reference_file.file_path
         
         # Delete from database
         db.session.delete(reference_file)
         db.session.commit()
         
+        # Delete file from disk in the background, the response only waits for the DB delete.
+        # 文件可能被其他记录共用，是否真正删除由后台任务在删除前确认
+        cleanup_task_manager.submit_task(
+            f"delete-{file_id}", _delete_stored_file_async,
+            relative_path, current_app._get_current_object()
+        )
+        
         logger.info(f"Deleted reference file: {file_id}")
         
         return success_response({'message': 'File deleted successfully'})
@@ -277,27 +394,56 @@ def list_project_reference_files(project_id):
     - 'global' or 'none': List only global files (not associated with any project)
     - project_id: List files for specific project
     
+    Query params (optional, keyset pagination ordered by id):
+    - limit: Page size (default 50, max 200)
+    - after: Return files whose id sorts after this cursor
+    
     Returns:
-        List of reference files
+        List of reference files; when paginating also next_cursor (None on the last page)
     """
     try:
+        query = ReferenceFile.query.options(*_LIST_QUERY_OPTIONS)
         # Special case: 'all' means list all files
         if project_id == 'all':
-            reference_files = ReferenceFile.query.all()
+            pass
         # Special case: 'global' or 'none' means list global files (not associated with any project)
         elif project_id in ['global', 'none']:
-            reference_files = ReferenceFile.query.filter_by(project_id=None).all()
+            query = query.filter_by(project_id=None)
         else:
             # Verify project exists
-            project = Project.query.get(project_id)
+            project = db.session.get(Project, project_id)
             if not project:
                 return not_found('Project')
             
-            reference_files = ReferenceFile.query.filter_by(project_id=project_id).all()
+            query = query.filter_by(project_id=project_id)
+        
+        # 未传分页参数时保持原行为，返回全部文件
+        if 'limit' not in request.args and 'after' not in request.args:
+            reference_files = query.all()
+            # 列表查询时不包含 markdown_content 和失败计数，加快响应速度
+            return success_response({
+                'files': [f.to_dict(include_content=False) for f in reference_files]
+            })
+        
+        try:
+            limit = int(request.args.get('limit', _DEFAULT_PAGE_SIZE))
+        except ValueError:
+            return bad_request("limit must be an integer")
+        if limit < 1:
+            return bad_request("limit must be a positive integer")
+        limit = min(limit, _MAX_PAGE_SIZE)
+        
+        after = request.args.get('after')
+        if after:
+            query = query.filter(ReferenceFile.id > after)
+        # 多取一行判断是否还有下一页，避免总数恰好是 limit 整数倍时多出一次空页请求
+        reference_files = query.order_by(ReferenceFile.id).limit(limit + 1).all()
+        has_more = len(reference_files) > limit
+        reference_files = reference_files[:limit]
         
-        # 列表查询时不包含 markdown_content 和失败计数，加快响应速度
         return success_response({
-            'files': [f.to_dict(include_content=False) for f in reference_files]
+            'files': [f.to_dict(include_content=False) for f in reference_files],
+            'next_cursor': reference_files[-1].id if has_more else None
         })
         
     except Exception as e:
@@ -314,25 +460,20 @@ def trigger_file_parse(file_id):
         Updated reference file information
     """
     try:
-        reference_file = ReferenceFile.query.get(file_id)
+        reference_file = db.session.get(ReferenceFile, file_id)
         if not reference_file:
             return not_found('Reference file')
         
         # 如果正在解析，直接返回
-        if reference_file.parse_status == 'parsing':
+        if reference_file.parse_status == 'parsing' or parse_task_manager.is_task_active(file_id):
             return success_response({
                 'file': reference_file.to_dict(),
                 'message': 'File is already being parsed'
             })
         
-        # 如果解析完成或失败，可以重新解析
-        if reference_file.parse_status in ['completed', 'failed']:
-            reference_file.parse_status = 'pending'
-            reference_file.error_message = None
-            # 清空之前的解析结果，以便重新解析
-            reference_file.markdown_content = None
-            reference_file.mineru_batch_id = None
-            db.session.commit()
+        # 解析队列已满时拒绝新任务，避免无限制地占用线程和数据库连接
+        if parse_task_manager.active_count() >= current_app.config['MAX_PENDING_PARSE_TASKS']:
+            return rate_limit_error("Too many files are being parsed, please try again later")
         
         # 获取文件路径
         upload_folder = current_app.config['UPLOAD_FOLDER']
@@ -341,13 +482,50 @@ def trigger_file_parse(file_id):
         if not file_path.exists():
             return error_response('FILE_NOT_FOUND', f'File not found: {file_path}', 404)
         
-        # 启动异步解析
-        thread = threading.Thread(
-            target=_parse_file_async,
-            args=(reference_file.id, str(file_path), reference_file.filename, current_app._get_current_object())
-        )
-        thread.daemon = True
-        thread.start()
+        # 用条件 UPDATE 原子地抢占解析任务：只有不处于 parsing 的记录会被更新，
+        # 并发的重复触发中只有一个请求能拿到 rowcount=1，避免重复调用 MinerU。
+        # 同时清空之前的解析结果以便重新解析，后台任务只需在结束时再提交一次
+        claimed = db.session.execute(
+            update(ReferenceFile)
+            .where(ReferenceFile.id == file_id, ReferenceFile.parse_status != 'parsing')
+            .values(
+                parse_status='parsing',
+                error_message=None,
+                markdown_content=None,
+                mineru_batch_id=None,
+                updated_at=datetime.utcnow()
+            )
+        ).rowcount
+        db.session.commit()
+        
+        if not claimed:
+            return success_response({
+                'file': reference_file.to_dict(),
+                'message': 'File is already being parsed'
+            })
+        
+        # 提交到有界的解析线程池；提交失败时回退状态，否则记录会一直停留在 parsing
+        try:
+            parse_task_manager.submit_task(
+                reference_file.id, _parse_file_async,
+                str(file_path), reference_file.filename, current_app._get_current_object()
+            )
+        except Exception as e:
+            logger.error(f"Failed to submit parse task for file {file_id}: {str(e)}", exc_info=True)
+            db.session.rollback()
+            db.session.execute(
+                update(ReferenceFile)
+                .where(ReferenceFile.id == file_id)
+                .values(
+                    parse_status='failed',
+                    error_message=f"Failed to start parsing: {str(e)}",
+                    updated_at=datetime.utcnow()
+                )
+            )
+            db.session.commit()
+            _notify_parse_status_changed()
+            return error_response('SERVER_ERROR', f"Failed to start parsing: {str(e)}", 500)
+        _notify_parse_status_changed()
         
         logger.info(f"Triggered parsing for file: {reference_file.filename} (ID: {file_id})")
         
@@ -361,6 +539,60 @@ def trigger_file_parse(file_id):
         return error_response('SERVER_ERROR', str(e), 500)
 
 
+@reference_file_bp.route('/<file_id>/events', methods=['GET'])
+def stream_parse_events(file_id):
+    """
+    GET /api/reference-files/<file_id>/events - Stream parse status changes (Server-Sent Events)
+    
+    Sends a `status` event with the file information (without markdown_content) whenever
+    parse_status changes, and closes the stream once parsing has completed or failed.
+    Sends a `deleted` event if the file is removed while streaming.
+    
+    A file that has not been triggered ('pending') gets a single `status` event and the
+    stream is closed; subscribe after POST /parse. Streams are also closed after
+    _SSE_MAX_LIFETIME seconds so a stuck task cannot hold a worker forever.
+    """
+    reference_file = db.session.get(ReferenceFile, file_id)
+    if not reference_file:
+        return not_found('Reference file')
+    
+    def generate():
+        last_status = None
+        last_sent = started = time.monotonic()
+        while True:
+            reference_file = db.session.get(ReferenceFile, file_id)
+            if not reference_file:
+                yield "event: deleted\ndata: {}\n\n"
+                return
+            
+            status = reference_file.parse_status
+            if status != last_status:
+                payload = json.dumps(reference_file.to_dict(include_content=False), ensure_ascii=False)
+                yield f"event: status\ndata: {payload}\n\n"
+                last_status = status
+                last_sent = time.monotonic()
+            
+            # 结束只读事务：连接归还连接池，下次查询读取最新数据
+            db.session.rollback()
+            # pending 表示尚未触发解析，状态不会自行变化，没有必要保持连接
+            if status in ('completed', 'failed', 'pending'):
+                return
+            if time.monotonic() - started >= _SSE_MAX_LIFETIME:
+                return
+            
+            with _parse_status_changed:
+                notified = _parse_status_changed.wait(timeout=_SSE_RECHECK_INTERVAL)
+            if not notified and time.monotonic() - last_sent >= _SSE_KEEPALIVE_INTERVAL:
+                yield ": keepalive\n\n"
+                last_sent = time.monotonic()
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @reference_file_bp.route('/<file_id>/associate', methods=['POST'])
 def associate_file_to_project(file_id):
     """
@@ -375,7 +607,7 @@ def associate_file_to_project(file_id):
         Updated reference file information
     """
     try:
-        reference_file = ReferenceFile.query.get(file_id)
+        reference_file = db.session.get(ReferenceFile, file_id)
         if not reference_file:
             return not_found('Reference file')
         
@@ -386,7 +618,7 @@ def associate_file_to_project(file_id):
             return bad_request("project_id is required")
         
         # Verify project exists
-        project = Project.query.get(project_id)
+        project = db.session.get(Project, project_id)
         if not project:
             return not_found('Project')
         
@@ -416,7 +648,7 @@ def dissociate_file_from_project(file_id):
         Updated reference file information
     """
     try:
-        reference_file = ReferenceFile.query.get(file_id)
+        reference_file = db.session.get(ReferenceFile, file_id)
         if not reference_file:
             return not_found('Reference file')
         
@@ -3,8 +3,8 @@
 import logging
 from flask import Blueprint, request, current_app
 from models import db, Settings
-from utils import success_response, error_response, bad_request
-from datetime import datetime, timezone
+from models import settings_cache
+from utils import success_response, error_response, bad_request, no_expire_on_commit
 from config import Config
 
 logger = logging.getLogger(__name__)
@@ -13,6 +13,78 @@ settings_bp = Blueprint(
     "settings", __name__, url_prefix="/api/settings"
 )
 
+# 设置项允许的取值
+_AI_PROVIDERS = frozenset({"openai", "gemini"})
+_RESOLUTIONS = frozenset({"1K", "2K", "4K"})
+_LANGUAGES = frozenset({"zh", "en", "ja", "auto"})
+
+def _str_or_none(value):
+    """Trim a string value; None or blank clears the override (fall back to env/default)"""
+    if value is None:
+        return None
+    return str(value).strip() or None
+
+
+def _as_is(value):
+    """Store the value unchanged"""
+    return value
+
+
+def _choice(allowed, message):
+    """Build a coercer that only accepts values from `allowed`"""
+    def coerce(value):
+        if value not in allowed:
+            raise ValueError(message)
+        return value
+    return coerce
+
+
+def _int_between(low, high, message):
+    """Build a coercer that accepts integers within [low, high]"""
+    def coerce(value):
+        try:
+            number = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(message)
+        if not low <= number <= high:
+            raise ValueError(message)
+        return number
+    return coerce
+
+
+# update_settings 可更新的字段：请求字段名（同 Settings 属性名） -> 校验/转换函数
+# 转换函数在值非法时抛出 ValueError，错误信息直接返回给前端
+_FIELD_HANDLERS = {
+    # AI provider & API configuration
+    "ai_provider_format": _choice(_AI_PROVIDERS, "AI provider format must be 'openai' or 'gemini'"),
+    "api_base_url": _str_or_none,
+    "api_key": _as_is,
+    # Image generation configuration
+    "image_resolution": _choice(_RESOLUTIONS, "Resolution must be 1K, 2K, or 4K"),
+    "image_aspect_ratio": _as_is,
+    # Worker configuration
+    "max_description_workers": _int_between(1, 20, "Max description workers must be between 1 and 20"),
+    "max_image_workers": _int_between(1, 20, "Max image workers must be between 1 and 20"),
+    # Model & MinerU configuration (optional, empty values fall back to Config)
+    "text_model": _str_or_none,
+    "image_model": _str_or_none,
+    "mineru_api_base": _str_or_none,
+    "mineru_token": _as_is,
+    "image_caption_model": _str_or_none,
+    "output_language": _choice(_LANGUAGES, "Output language must be 'zh', 'en', 'ja', or 'auto'"),
+}
+
+# 变化时需要重建 AIService 的配置项
+_AI_CONFIG_KEYS = (
+    "AI_PROVIDER_FORMAT",
+    "GOOGLE_API_BASE",
+    "OPENAI_API_BASE",
+    "GOOGLE_API_KEY",
+    "OPENAI_API_KEY",
+    "TEXT_MODEL",
+    "IMAGE_MODEL",
+)
+
 
 # Prevent redirect issues when trailing slash is missing
 @settings_bp.route("/", methods=["GET"], strict_slashes=False)
@@ -21,10 +93,9 @@ def get_settings():
     GET /api/settings - Get application settings
     """
     try:
-        settings = Settings.get_settings()
-        return success_response(settings.to_dict())
+        return success_response(dict(settings_cache.get_cached_settings()))
     except Exception as e:
-        logger.error(f"Error getting settings: {str(e)}")
+        logger.error("Error getting settings: %s", e)
         return error_response(
             "GET_SETTINGS_ERROR",
             f"Failed to get settings: {str(e)}",
@@ -46,85 +117,22 @@ def update_settings():
         }
     """
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         if not data:
             return bad_request("Request body is required")
 
         settings = Settings.get_settings()
 
-        # Update AI provider format configuration
-        if "ai_provider_format" in data:
-            provider_format = data["ai_provider_format"]
-            if provider_format not in ["openai", "gemini"]:
-                return bad_request("AI provider format must be 'openai' or 'gemini'")
-            settings.ai_provider_format = provider_format
-
-        # Update API configuration
-        if "api_base_url" in data:
-            raw_base_url = data["api_base_url"]
-            # Empty string from frontend means "clear override, fall back to env/default"
-            if raw_base_url is None:
-                settings.api_base_url = None
-            else:
-                value = str(raw_base_url).strip()
-                settings.api_base_url = value if value != "" else None
-
-        if "api_key" in data:
-            settings.api_key = data["api_key"]
-
-        # Update image generation configuration
-        if "image_resolution" in data:
-            resolution = data["image_resolution"]
-            if resolution not in ["1K", "2K", "4K"]:
-                return bad_request("Resolution must be 1K, 2K, or 4K")
-            settings.image_resolution = resolution
-
-        if "image_aspect_ratio" in data:
-            aspect_ratio = data["image_aspect_ratio"]
-            settings.image_aspect_ratio = aspect_ratio
-
-        # Update worker configuration
-        if "max_description_workers" in data:
-            workers = int(data["max_description_workers"])
-            if workers < 1 or workers > 20:
-                return bad_request(
-                    "Max description workers must be between 1 and 20"
-                )
-            settings.max_description_workers = workers
-
-        if "max_image_workers" in data:
-            workers = int(data["max_image_workers"])
-            if workers < 1 or workers > 20:
-                return bad_request(
-                    "Max image workers must be between 1 and 20"
-                )
-            settings.max_image_workers = workers
-
-        # Update model & MinerU configuration (optional, empty values fall back to Config)
-        if "text_model" in data:
-            settings.text_model = (data["text_model"] or "").strip() or None
-
-        if "image_model" in data:
-            settings.image_model = (data["image_model"] or "").strip() or None
-
-        if "mineru_api_base" in data:
-            settings.mineru_api_base = (data["mineru_api_base"] or "").strip() or None
-
-        if "mineru_token" in data:
-            settings.mineru_token = data["mineru_token"]
-
-        if "image_caption_model" in data:
-            settings.image_caption_model = (data["image_caption_model"] or "").strip() or None
-
-        if "output_language" in data:
-            language = data["output_language"]
-            if language in ["zh", "en", "ja", "auto"]:
-                settings.output_language = language
-            else:
-                return bad_request("Output language must be 'zh', 'en', 'ja', or 'auto'")
-
-        settings.updated_at = datetime.now(timezone.utc)
-        db.session.commit()
+        for key, coerce in _FIELD_HANDLERS.items():
+            if key in data:
+                try:
+                    setattr(settings, key, coerce(data[key]))
+                except ValueError as e:
+                    return bad_request(str(e))
+
+        # 提交后直接用内存中的值同步配置并序列化，无需重新加载
+        with no_expire_on_commit(db.session):
+            db.session.commit()
 
         # Sync to app.config
         _sync_settings_to_config(settings)
@@ -136,7 +144,7 @@ def update_settings():
 
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error updating settings: {str(e)}")
+        logger.error("Error updating settings: %s", e)
         return error_response(
             "UPDATE_SETTINGS_ERROR",
             f"Failed to update settings: {str(e)}",
@@ -178,9 +186,10 @@ def reset_settings():
         settings.image_aspect_ratio = Config.DEFAULT_ASPECT_RATIO
         settings.max_description_workers = Config.MAX_DESCRIPTION_WORKERS
         settings.max_image_workers = Config.MAX_IMAGE_WORKERS
-        settings.updated_at = datetime.now(timezone.utc)
 
-        db.session.commit()
+        # 提交后直接用内存中的值同步配置并序列化，无需重新加载
+        with no_expire_on_commit(db.session):
+            db.session.commit()
 
         # Sync to app.config
         _sync_settings_to_config(settings)
@@ -192,7 +201,7 @@ def reset_settings():
 
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error resetting settings: {str(e)}")
+        logger.error("Error resetting settings: %s", e)
         return error_response(
             "RESET_SETTINGS_ERROR",
             f"Failed to reset settings: {str(e)}",
@@ -202,92 +211,68 @@ def reset_settings():
 
 def _sync_settings_to_config(settings: Settings):
     """Sync settings to Flask app config and clear AI service cache if needed"""
-    # Track if AI-related settings changed
-    ai_config_changed = False
-    
+    # 需要写入的配置项（数据库中的值覆盖环境变量）
+    updates = {
+        # Sync image generation settings
+        "DEFAULT_RESOLUTION": settings.image_resolution,
+        "DEFAULT_ASPECT_RATIO": settings.image_aspect_ratio,
+        # Sync worker settings
+        "MAX_DESCRIPTION_WORKERS": settings.max_description_workers,
+        "MAX_IMAGE_WORKERS": settings.max_image_workers,
+    }
+    # 需要移除的覆盖项（回退到环境变量或默认值）
+    clears = set()
+
     # Sync AI provider format (always sync, has default value)
     if settings.ai_provider_format:
-        old_format = current_app.config.get("AI_PROVIDER_FORMAT")
-        if old_format != settings.ai_provider_format:
-            ai_config_changed = True
-            logger.info(f"AI provider format changed: {old_format} -> {settings.ai_provider_format}")
-        current_app.config["AI_PROVIDER_FORMAT"] = settings.ai_provider_format
-    
+        updates["AI_PROVIDER_FORMAT"] = settings.ai_provider_format
+
     # Sync API configuration (sync to both GOOGLE_* and OPENAI_* to ensure DB settings override env vars)
     if settings.api_base_url is not None:
-        old_base = current_app.config.get("GOOGLE_API_BASE")
-        if old_base != settings.api_base_url:
-            ai_config_changed = True
-            logger.info(f"API base URL changed: {old_base} -> {settings.api_base_url}")
-        current_app.config["GOOGLE_API_BASE"] = settings.api_base_url
-        current_app.config["OPENAI_API_BASE"] = settings.api_base_url
+        updates["GOOGLE_API_BASE"] = updates["OPENAI_API_BASE"] = settings.api_base_url
     else:
-        # Remove overrides, fall back to env variables or defaults
-        if "GOOGLE_API_BASE" in current_app.config or "OPENAI_API_BASE" in current_app.config:
-            ai_config_changed = True
-            logger.info("API base URL cleared, falling back to defaults")
-        current_app.config.pop("GOOGLE_API_BASE", None)
-        current_app.config.pop("OPENAI_API_BASE", None)
+        clears.update(("GOOGLE_API_BASE", "OPENAI_API_BASE"))
 
     if settings.api_key is not None:
-        old_key = current_app.config.get("GOOGLE_API_KEY")
-        # Only compare existence, not actual value for security
-        if (old_key is None) != (settings.api_key is None):
-            ai_config_changed = True
-            logger.info("API key updated")
-        current_app.config["GOOGLE_API_KEY"] = settings.api_key
-        current_app.config["OPENAI_API_KEY"] = settings.api_key
+        updates["GOOGLE_API_KEY"] = updates["OPENAI_API_KEY"] = settings.api_key
     else:
-        # Remove overrides, fall back to env variables or defaults
-        if "GOOGLE_API_KEY" in current_app.config or "OPENAI_API_KEY" in current_app.config:
-            ai_config_changed = True
-            logger.info("API key cleared, falling back to defaults")
-        current_app.config.pop("GOOGLE_API_KEY", None)
-        current_app.config.pop("OPENAI_API_KEY", None)
-    
-    # Check model changes
+        clears.update(("GOOGLE_API_KEY", "OPENAI_API_KEY"))
+
     if settings.text_model is not None:
-        old_model = current_app.config.get("TEXT_MODEL")
-        if old_model != settings.text_model:
-            ai_config_changed = True
-            logger.info(f"Text model changed: {old_model} -> {settings.text_model}")
-        current_app.config["TEXT_MODEL"] = settings.text_model
-    
+        updates["TEXT_MODEL"] = settings.text_model
     if settings.image_model is not None:
-        old_model = current_app.config.get("IMAGE_MODEL")
-        if old_model != settings.image_model:
-            ai_config_changed = True
-            logger.info(f"Image model changed: {old_model} -> {settings.image_model}")
-        current_app.config["IMAGE_MODEL"] = settings.image_model
-
-    # Sync image generation settings
-    current_app.config["DEFAULT_RESOLUTION"] = settings.image_resolution
-    current_app.config["DEFAULT_ASPECT_RATIO"] = settings.image_aspect_ratio
-
-    # Sync worker settings
-    current_app.config["MAX_DESCRIPTION_WORKERS"] = settings.max_description_workers
-    current_app.config["MAX_IMAGE_WORKERS"] = settings.max_image_workers
-    logger.info(f"Updated worker settings: desc={settings.max_description_workers}, img={settings.max_image_workers}")
+        updates["IMAGE_MODEL"] = settings.image_model
 
     # Sync MinerU settings (optional, fall back to Config defaults if None)
     if settings.mineru_api_base:
-        current_app.config["MINERU_API_BASE"] = settings.mineru_api_base
-        logger.info(f"Updated MINERU_API_BASE to: {settings.mineru_api_base}")
+        updates["MINERU_API_BASE"] = settings.mineru_api_base
     if settings.mineru_token is not None:
-        current_app.config["MINERU_TOKEN"] = settings.mineru_token
-        logger.info("Updated MINERU_TOKEN from settings")
+        updates["MINERU_TOKEN"] = settings.mineru_token
     if settings.image_caption_model:
-        current_app.config["IMAGE_CAPTION_MODEL"] = settings.image_caption_model
-        logger.info(f"Updated IMAGE_CAPTION_MODEL to: {settings.image_caption_model}")
+        updates["IMAGE_CAPTION_MODEL"] = settings.image_caption_model
     if settings.output_language:
-        current_app.config["OUTPUT_LANGUAGE"] = settings.output_language
-        logger.info(f"Updated OUTPUT_LANGUAGE to: {settings.output_language}")
-    
+        updates["OUTPUT_LANGUAGE"] = settings.output_language
+
+    # 一次遍历计算实际变化的配置项，再批量写入
+    config = current_app.config
+    changed = {key for key, value in updates.items() if config.get(key) != value}
+    changed.update(key for key in clears if key in config)
+
+    ai_config_before = tuple(config.get(key) for key in _AI_CONFIG_KEYS)
+    config.update(updates)
+    for key in clears:
+        config.pop(key, None)
+    ai_config_after = tuple(config.get(key) for key in _AI_CONFIG_KEYS)
+
+    if changed:
+        # 只记录键名，不输出 API Key 等敏感值
+        logger.info("Settings synced to app config, changed: %s", ", ".join(sorted(changed)))
+
     # Clear AI service cache if AI-related configuration changed
-    if ai_config_changed:
+    if ai_config_before != ai_config_after:
         try:
             from services.ai_service_manager import clear_ai_service_cache
             clear_ai_service_cache()
             logger.warning("AI configuration changed - AIService cache cleared. New providers will be created on next request.")
         except Exception as e:
-            logger.error(f"Failed to clear AI service cache: {e}")
+            logger.error("Failed to clear AI service cache: %s", e)
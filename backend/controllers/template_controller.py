@@ -2,17 +2,29 @@
 Template Controller - handles template-related endpoints
 """
 import logging
+from datetime import datetime
 from flask import Blueprint, request, current_app
+from sqlalchemy import tuple_
+from sqlalchemy.orm import load_only
 from models import db, Project, UserTemplate
-from utils import success_response, error_response, not_found, bad_request, allowed_file
-from services import FileService
-from datetime import datetime
+from utils import success_response, error_response, not_found, bad_request, allowed_file, no_expire_on_commit
+from services import get_file_service
 
 logger = logging.getLogger(__name__)
 
 template_bp = Blueprint('templates', __name__, url_prefix='/api/projects')
 user_template_bp = Blueprint('user_templates', __name__, url_prefix='/api/user-templates')
 
+# 模板列表只需要 to_dict 用到的列
+_TEMPLATE_LIST_COLUMNS = load_only(
+    UserTemplate.id, UserTemplate.name, UserTemplate.file_path,
+    UserTemplate.created_at, UserTemplate.updated_at
+)
+
+# 模板列表分页时的默认/最大页大小
+_DEFAULT_PAGE_SIZE = 50
+_MAX_PAGE_SIZE = 200
+
 
 @template_bp.route('/<project_id>/template', methods=['POST'])
 def upload_template(project_id):
@@ -23,7 +35,7 @@ def upload_template(project_id):
     Form: template_image=@file.png
     """
     try:
-        project = Project.query.get(project_id)
+        project = db.session.get(Project, project_id)
         
         if not project:
             return not_found('Project')
@@ -42,17 +54,18 @@ def upload_template(project_id):
             return bad_request("Invalid file type. Allowed types: png, jpg, jpeg, gif, webp")
         
         # Save template
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
+        file_service = get_file_service()
         file_path = file_service.save_template_image(file, project_id)
         
         # Update project
         project.template_image_path = file_path
+        # 同扩展名重新上传时路径不变，不会触发 onupdate；显式更新时间以便前端刷新缓存
         project.updated_at = datetime.utcnow()
         
         db.session.commit()
         
         return success_response({
-            'template_image_url': f'/files/{project_id}/template/{file_path.split("/")[-1]}'
+            'template_image_url': f'/files/{project_id}/template/{file_path.rpartition("/")[2]}'
         })
     
     except Exception as e:
@@ -66,7 +79,7 @@ def delete_template(project_id):
     DELETE /api/projects/{project_id}/template - Delete template
     """
     try:
-        project = Project.query.get(project_id)
+        project = db.session.get(Project, project_id)
         
         if not project:
             return not_found('Project')
@@ -75,7 +88,7 @@ def delete_template(project_id):
             return bad_request("No template to delete")
         
         # Delete template file
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
+        file_service = get_file_service()
         file_service.delete_template(project_id)
         
         # Update project
@@ -134,18 +147,13 @@ def upload_user_template():
         # Get optional name
         name = request.form.get('name', None)
         
-        # Get file size before saving
-        file.seek(0, 2)  # Seek to end
-        file_size = file.tell()
-        file.seek(0)  # Reset to beginning
-        
         # Generate template ID first
         import uuid
         template_id = str(uuid.uuid4())
         
         # Save template file first (using the generated ID)
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
-        file_path = file_service.save_user_template(file, template_id)
+        file_service = get_file_service()
+        file_path, file_size = file_service.save_user_template(file, template_id)
         
         # Create template record with file_path already set
         template = UserTemplate(
@@ -155,7 +163,8 @@ def upload_user_template():
             file_size=file_size
         )
         db.session.add(template)
-        db.session.commit()
+        with no_expire_on_commit(db.session):
+            db.session.commit()
         
         return success_response(template.to_dict())
     
@@ -163,7 +172,7 @@ def upload_user_template():
         import traceback
         db.session.rollback()
         error_msg = str(e)
-        logger.error(f"Error uploading user template: {error_msg}", exc_info=True)
+        logger.error("Error uploading user template: %s", error_msg, exc_info=True)
         # 在开发环境中返回详细错误，生产环境返回通用错误
         if current_app.config.get('DEBUG', False):
             return error_response('SERVER_ERROR', f"{error_msg}\n{traceback.format_exc()}", 500)
@@ -175,12 +184,55 @@ def upload_user_template():
 def list_user_templates():
     """
     GET /api/user-templates - Get list of user templates
+    
+    Query params (optional, cursor pagination, newest first):
+    - limit: Page size (default 50, max 200)
+    - cursor: next_cursor value returned by the previous page
     """
     try:
-        templates = UserTemplate.query.order_by(UserTemplate.created_at.desc()).all()
+        query = UserTemplate.query.options(_TEMPLATE_LIST_COLUMNS).order_by(
+            UserTemplate.created_at.desc(), UserTemplate.id.desc()
+        )
+        
+        # 未传分页参数时保持原行为，返回全部模板
+        if 'limit' not in request.args and 'cursor' not in request.args:
+            templates = query.all()
+            return success_response({
+                'templates': [template.to_dict() for template in templates]
+            })
+        
+        try:
+            limit = int(request.args.get('limit', _DEFAULT_PAGE_SIZE))
+        except ValueError:
+            return bad_request("limit must be an integer")
+        if limit < 1:
+            return bad_request("limit must be a positive integer")
+        limit = min(limit, _MAX_PAGE_SIZE)
+        
+        cursor = request.args.get('cursor')
+        if cursor:
+            # 游标格式: <created_at ISO>|<id>，按 (created_at, id) 倒序继续向后翻页
+            created_at_str, separator, last_id = cursor.partition('|')
+            if not separator or not last_id:
+                return bad_request("Invalid cursor")
+            try:
+                created_at = datetime.fromisoformat(created_at_str)
+            except ValueError:
+                return bad_request("Invalid cursor")
+            query = query.filter(tuple_(UserTemplate.created_at, UserTemplate.id) < (created_at, last_id))
+        
+        # 多取一行判断是否还有下一页，避免总数恰好是 limit 整数倍时多出一次空页请求
+        templates = query.limit(limit + 1).all()
+        has_more = len(templates) > limit
+        templates = templates[:limit]
+        next_cursor = None
+        if has_more:
+            last = templates[-1]
+            next_cursor = f"{last.created_at.isoformat()}|{last.id}"
         
         return success_response({
-            'templates': [template.to_dict() for template in templates]
+            'templates': [template.to_dict() for template in templates],
+            'next_cursor': next_cursor
         })
     
     except Exception as e:
@@ -193,13 +245,13 @@ def delete_user_template(template_id):
     DELETE /api/user-templates/{template_id} - Delete user template
     """
     try:
-        template = UserTemplate.query.get(template_id)
+        template = db.session.get(UserTemplate, template_id)
         
         if not template:
             return not_found('UserTemplate')
         
         # Delete template file
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
+        file_service = get_file_service()
         file_service.delete_user_template(template_id)
         
         # Delete template record
@@ -1,9 +1,10 @@
 import os
+import sqlite3
 import sys
 from logging.config import fileConfig
 
 from alembic import context
-from sqlalchemy import engine_from_config, pool
+from sqlalchemy import engine_from_config, event, pool
 
 # Add the backend directory to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -29,6 +30,28 @@ def get_url() -> str:
     return app.config["SQLALCHEMY_DATABASE_URI"]
 
 
+def _tune_sqlite_for_migration(dbapi_conn, connection_record):
+    """Migration-only PRAGMAs on top of the WAL/synchronous settings applied in app.py."""
+    if not isinstance(dbapi_conn, sqlite3.Connection):
+        return
+
+    cursor = dbapi_conn.cursor()
+    try:
+        # batch_alter_table 重建表时的临时 B 树放内存，并加大页缓存（64MB）
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-65536")
+    finally:
+        cursor.close()
+
+    # 关闭 pysqlite 的隐式事务管理（它不会为 DDL 开启事务），改由 _begin_immediate 显式 BEGIN
+    dbapi_conn.isolation_level = None
+
+
+def _begin_immediate(connection):
+    """Start one explicit write transaction so every revision's DDL and DML commit together."""
+    connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
     url = get_url()
@@ -51,12 +74,18 @@ def run_migrations_online() -> None:
         prefix="sqlalchemy.",
         poolclass=pool.NullPool,
     )
+    is_sqlite = connectable.dialect.name == "sqlite"
+    if is_sqlite:
+        event.listen(connectable, "connect", _tune_sqlite_for_migration)
+        event.listen(connectable, "begin", _begin_immediate)
 
     with connectable.connect() as connection:
         context.configure(
             connection=connection,
             target_metadata=target_metadata,
             compare_type=True,
+            # SQLite 支持事务性 DDL：整次升级在一个事务内完成，失败时整体回滚
+            transactional_ddl=is_sqlite or None,
         )
 
         with context.begin_transaction():
@@ -17,12 +17,11 @@ branch_labels = None
 depends_on = None
 
 
-def _column_exists(table_name: str, column_name: str) -> bool:
-    """检查列是否存在"""
+def _existing_columns(table_name: str) -> set:
+    """获取表中已有的列名（反射一次，供多次检查复用）"""
     bind = op.get_bind()
     inspector = inspect(bind)
-    columns = [col['name'] for col in inspector.get_columns(table_name)]
-    return column_name in columns
+    return {col['name'] for col in inspector.get_columns(table_name)}
 
 
 def upgrade() -> None:
@@ -31,20 +30,23 @@ def upgrade() -> None:
     
     Idempotent: checks each column before adding.
     """
+    # 本次升级只新增列，反射一次即可
+    existing_columns = _existing_columns('settings')
+    
     # Add text_model column if not exists
-    if not _column_exists('settings', 'text_model'):
+    if 'text_model' not in existing_columns:
         op.add_column('settings', sa.Column('text_model', sa.String(length=100), nullable=True))
     
     # Add image_model column if not exists
-    if not _column_exists('settings', 'image_model'):
+    if 'image_model' not in existing_columns:
         op.add_column('settings', sa.Column('image_model', sa.String(length=100), nullable=True))
     
     # Add mineru_api_base column if not exists
-    if not _column_exists('settings', 'mineru_api_base'):
+    if 'mineru_api_base' not in existing_columns:
         op.add_column('settings', sa.Column('mineru_api_base', sa.String(length=255), nullable=True))
     
     # Add image_caption_model column if not exists
-    if not _column_exists('settings', 'image_caption_model'):
+    if 'image_caption_model' not in existing_columns:
         op.add_column('settings', sa.Column('image_caption_model', sa.String(length=100), nullable=True))
 
 
@@ -0,0 +1,38 @@
+"""add (project_id, id) index to reference_files
+
+Revision ID: 007_add_reference_file_index
+Revises: 006_add_export_settings
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = '007_add_reference_file_index'
+down_revision = '006_add_export_settings'
+branch_labels = None
+depends_on = None
+
+
+def _index_exists(table_name: str, index_name: str) -> bool:
+    """Check if index exists"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    return index_name in [index['name'] for index in inspector.get_indexes(table_name)]
+
+
+def upgrade() -> None:
+    """
+    Add composite (project_id, id) index so keyset-paginated listing of a
+    project's reference files is an index range scan.
+    
+    Idempotent: checks if index exists before creating.
+    """
+    if not _index_exists('reference_files', 'ix_reference_files_project_id_id'):
+        op.create_index('ix_reference_files_project_id_id', 'reference_files', ['project_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reference_files_project_id_id', table_name='reference_files')
@@ -0,0 +1,51 @@
+"""add content_hash to reference_files
+
+Revision ID: 008_add_content_hash
+Revises: 007_add_reference_file_index
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = '008_add_content_hash'
+down_revision = '007_add_reference_file_index'
+branch_labels = None
+depends_on = None
+
+
+def _column_exists(table_name: str, column_name: str) -> bool:
+    """Check if column exists"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    columns = [col['name'] for col in inspector.get_columns(table_name)]
+    return column_name in columns
+
+
+def _index_exists(table_name: str, index_name: str) -> bool:
+    """Check if index exists"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    return index_name in [index['name'] for index in inspector.get_indexes(table_name)]
+
+
+def upgrade() -> None:
+    """
+    Add content_hash (SHA-256 of the uploaded file) to reference_files so
+    identical uploads share one stored file and reuse parse results.
+    Existing rows keep NULL and are simply never matched.
+    
+    Idempotent: checks if column/index exist before adding.
+    """
+    if not _column_exists('reference_files', 'content_hash'):
+        op.add_column('reference_files', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    if not _index_exists('reference_files', 'ix_reference_files_content_hash'):
+        op.create_index('ix_reference_files_content_hash', 'reference_files', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reference_files_content_hash', table_name='reference_files')
+    op.drop_column('reference_files', 'content_hash')
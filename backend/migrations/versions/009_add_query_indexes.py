@@ -0,0 +1,52 @@
+"""add indexes for common list/filter queries
+
+Revision ID: 009_add_query_indexes
+Revises: 008_add_content_hash
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = '009_add_query_indexes'
+down_revision = '008_add_content_hash'
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns)
+INDEXES = [
+    ('ix_pages_project_id_order_index', 'pages', ['project_id', 'order_index']),
+    ('ix_materials_project_id_created_at', 'materials', ['project_id', 'created_at']),
+    ('ix_user_templates_created_at_id', 'user_templates', ['created_at', 'id']),
+    ('ix_projects_updated_at', 'projects', ['updated_at']),
+]
+
+
+def _existing_indexes(inspector, table_name: str) -> set:
+    """Get the names of the indexes on a table"""
+    return {index['name'] for index in inspector.get_indexes(table_name)}
+
+
+def upgrade() -> None:
+    """
+    Add indexes backing the hottest queries:
+    - pages: WHERE project_id = ? ORDER BY order_index
+    - materials: WHERE project_id = ? ORDER BY created_at DESC
+    - user_templates: ORDER BY created_at DESC, id
+    - projects: ORDER BY updated_at DESC
+    
+    Idempotent: checks if each index exists before creating.
+    """
+    # 共用一个 inspector，每张表只反射一次
+    inspector = inspect(op.get_bind())
+    for index_name, table_name, columns in INDEXES:
+        if index_name not in _existing_indexes(inspector, table_name):
+            op.create_index(index_name, table_name, columns, unique=False)
+
+
+def downgrade() -> None:
+    for index_name, table_name, _ in reversed(INDEXES):
+        op.drop_index(index_name, table_name=table_name)
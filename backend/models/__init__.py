@@ -1,20 +1,14 @@
 """Database models package"""
 from flask_sqlalchemy import SQLAlchemy
 
-# 创建 SQLAlchemy 实例，配置 SQLite 连接选项
-db = SQLAlchemy(
-    engine_options={
-        'connect_args': {
-            'check_same_thread': False,  # 允许跨线程使用（仅SQLite）
-            'timeout': 30,  # 数据库锁定超时（秒）- SQLite特定
-        },
-        'pool_pre_ping': True,  # 连接前检查，确保连接有效
-        'pool_recycle': 3600,  # 1小时回收连接，释放文件句柄
-        'pool_size': 5,  # SQLite连接池不需要太大（建议5-10）
-        'max_overflow': 10,  # 溢出连接数（SQLite受文件锁限制，不宜过大）
-        'pool_timeout': 30,  # 获取连接的超时时间（秒）
-    }
-)
+# 创建 SQLAlchemy 实例；引擎与连接池参数见 Config.SQLALCHEMY_ENGINE_OPTIONS
+db = SQLAlchemy()
+
+
+def _iso_z(dt):
+    """Format a naive UTC datetime as ISO 8601 with a 'Z' suffix so the frontend parses it as UTC"""
+    return dt.isoformat() + 'Z' if dt is not None else None
+
 
 from .project import Project
 from .page import Page
@@ -11,6 +11,10 @@ class Material(db.Model):
     Material model - represents a material image
     """
     __tablename__ = 'materials'
+    __table_args__ = (
+        # 按项目列出素材并按创建时间倒序（WHERE project_id = ? ORDER BY created_at DESC）
+        db.Index('ix_materials_project_id_created_at', 'project_id', 'created_at'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id = db.Column(db.String(36), db.ForeignKey('projects.id'), nullable=True)  # Can be null, for global materials not belonging to a project
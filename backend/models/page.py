@@ -12,6 +12,10 @@ class Page(db.Model):
     Page model - represents a single PPT page/slide
     """
     __tablename__ = 'pages'
+    __table_args__ = (
+        # 按项目取页面并按顺序排列（WHERE project_id = ? ORDER BY order_index）
+        db.Index('ix_pages_project_id_order_index', 'project_id', 'order_index'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id = db.Column(db.String(36), db.ForeignKey('projects.id'), nullable=False)
@@ -26,8 +30,9 @@ class Page(db.Model):
     
     # Relationships
     project = db.relationship('Project', back_populates='pages')
+    # 普通列表关系：批量删除页面时可用 selectinload 一次性加载所有版本，避免逐页查询
     image_versions = db.relationship('PageImageVersion', back_populates='page', 
-                                     lazy='dynamic', cascade='all, delete-orphan',
+                                     lazy='select', cascade='all, delete-orphan',
                                      order_by='PageImageVersion.version_number.desc()')
     
     def get_outline_content(self):
@@ -70,14 +75,14 @@ class Page(db.Model):
             'part': self.part,
             'outline_content': self.get_outline_content(),
             'description_content': self.get_description_content(),
-            'generated_image_url': f'/files/{self.project_id}/pages/{self.generated_image_path.split("/")[-1]}' if self.generated_image_path else None,
+            'generated_image_url': f'/files/{self.project_id}/pages/{self.generated_image_path.rpartition("/")[2]}' if self.generated_image_path else None,
             'status': self.status,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
         }
         
         if include_versions:
-            data['image_versions'] = [v.to_dict() for v in self.image_versions.all()]
+            data['image_versions'] = [v.to_dict(self.project_id) for v in self.image_versions]
         
         return data
     
@@ -3,7 +3,7 @@ Page Image Version model - stores historical versions of generated images
 """
 import uuid
 from datetime import datetime
-from . import db
+from . import db, _iso_z
 
 
 class PageImageVersion(db.Model):
@@ -22,23 +22,25 @@ class PageImageVersion(db.Model):
     # Relationships
     page = db.relationship('Page', back_populates='image_versions')
     
-    def to_dict(self):
-        """Convert to dictionary"""
-        # Get project_id from page relationship
-        project_id = self.page.project_id if self.page else None
-        # Format created_at with UTC timezone indicator for proper frontend parsing
-        created_at_str = None
-        if self.created_at:
-            # Add 'Z' suffix to indicate UTC timezone, so frontend can parse it correctly
-            created_at_str = self.created_at.isoformat() + 'Z' if not self.created_at.tzinfo else self.created_at.isoformat()
+    def to_dict(self, project_id=None):
+        """
+        Convert to dictionary
+        
+        Args:
+            project_id: Owning project ID if the caller already knows it; avoids
+                loading the page relationship for every version in a list
+        """
+        if project_id is None:
+            # Get project_id from page relationship
+            project_id = self.page.project_id if self.page else None
         return {
             'version_id': self.id,
             'page_id': self.page_id,
             'image_path': self.image_path,
-            'image_url': f'/files/{project_id}/pages/{self.image_path.split("/")[-1]}' if self.image_path and project_id else None,
+            'image_url': f'/files/{project_id}/pages/{self.image_path.rpartition("/")[2]}' if self.image_path and project_id else None,
             'version_number': self.version_number,
             'is_current': self.is_current,
-            'created_at': created_at_str,
+            'created_at': _iso_z(self.created_at),
         }
     
     def __repr__(self):
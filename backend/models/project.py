@@ -3,7 +3,7 @@ Project model
 """
 import uuid
 from datetime import datetime
-from . import db
+from . import db, _iso_z
 
 
 class Project(db.Model):
@@ -11,6 +11,10 @@ class Project(db.Model):
     Project model - represents a PPT project
     """
     __tablename__ = 'projects'
+    __table_args__ = (
+        # 项目列表按更新时间倒序分页
+        db.Index('ix_projects_updated_at', 'updated_at'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     idea_prompt = db.Column(db.Text, nullable=True)
@@ -38,15 +42,6 @@ class Project(db.Model):
     
     def to_dict(self, include_pages=False):
         """Convert to dictionary"""
-        # Format created_at and updated_at with UTC timezone indicator for proper frontend parsing
-        created_at_str = None
-        if self.created_at:
-            created_at_str = self.created_at.isoformat() + 'Z' if not self.created_at.tzinfo else self.created_at.isoformat()
-        
-        updated_at_str = None
-        if self.updated_at:
-            updated_at_str = self.updated_at.isoformat() + 'Z' if not self.updated_at.tzinfo else self.updated_at.isoformat()
-        
         data = {
             'project_id': self.id,
             'idea_prompt': self.idea_prompt,
@@ -54,13 +49,13 @@ class Project(db.Model):
             'description_text': self.description_text,
             'extra_requirements': self.extra_requirements,
             'creation_type': self.creation_type,
-            'template_image_url': f'/files/{self.id}/template/{self.template_image_path.split("/")[-1]}' if self.template_image_path else None,
+            'template_image_url': f'/files/{self.id}/template/{self.template_image_path.rpartition("/")[2]}' if self.template_image_path else None,
             'template_style': self.template_style,
             'export_extractor_method': self.export_extractor_method or 'hybrid',
             'export_inpaint_method': self.export_inpaint_method or 'hybrid',
             'status': self.status,
-            'created_at': created_at_str,
-            'updated_at': updated_at_str,
+            'created_at': _iso_z(self.created_at),
+            'updated_at': _iso_z(self.updated_at),
         }
         
         if include_pages:
@@ -1,16 +1,25 @@
 """
 Reference File model - stores uploaded reference files and their parsed content
 """
+import re
 import uuid
 from datetime import datetime
 from . import db
 
 
+# Markdown 图片: ![alt](url)，捕获 alt 文本
+_MARKDOWN_IMAGE_RE = re.compile(r'!\[(.*?)\]\([^\)]+\)')
+
+
 class ReferenceFile(db.Model):
     """
     Reference File model - represents an uploaded reference file
     """
     __tablename__ = 'reference_files'
+    __table_args__ = (
+        # 按项目分页列出文件（WHERE project_id = ? AND id > ? ORDER BY id）
+        db.Index('ix_reference_files_project_id_id', 'project_id', 'id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id = db.Column(db.String(36), db.ForeignKey('projects.id'), nullable=True)  # Can be null for global files
@@ -18,6 +27,7 @@ class ReferenceFile(db.Model):
     file_path = db.Column(db.String(500), nullable=False)  # Path relative to upload folder
     file_size = db.Column(db.Integer, nullable=False)  # File size in bytes
     file_type = db.Column(db.String(50), nullable=False)  # pdf, docx, pptx, etc.
+    content_hash = db.Column(db.String(64), nullable=True, index=True)  # SHA-256 of file content, used for dedup
     parse_status = db.Column(db.String(50), nullable=False, default='pending')  # pending|parsing|completed|failed
     markdown_content = db.Column(db.Text, nullable=True)  # Parsed markdown with enhanced image descriptions
     error_message = db.Column(db.Text, nullable=True)  # Error message if parsing failed
@@ -67,14 +77,11 @@ class ReferenceFile(db.Model):
         if not self.markdown_content:
             return 0
         
-        import re
-        # Match markdown images: ![alt](url)
-        pattern = r'!\[(.*?)\]\([^\)]+\)'
-        matches = re.findall(pattern, self.markdown_content)
-        
         # Count images with empty alt text
-        failed_count = sum(1 for alt_text in matches if not alt_text.strip())
-        return failed_count
+        return sum(
+            1 for match in _MARKDOWN_IMAGE_RE.finditer(self.markdown_content)
+            if not match.group(1).strip()
+        )
     
     def __repr__(self):
         return f'<ReferenceFile {self.id}: {self.filename} ({self.parse_status})>'
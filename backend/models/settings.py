@@ -1,6 +1,15 @@
 """Settings model"""
-from datetime import datetime, timezone
-from . import db
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, object_session
+from . import db, settings_cache
+
+# 支持 ON CONFLICT DO NOTHING 的方言
+_INSERT_BY_DIALECT = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert,
+}
 
 
 class Settings(db.Model):
@@ -25,8 +34,9 @@ class Settings(db.Model):
     mineru_token = db.Column(db.String(500), nullable=True)  # MinerU API Token（覆盖 Config.MINERU_TOKEN）
     image_caption_model = db.Column(db.String(100), nullable=True)  # 图片识别模型（覆盖 Config.IMAGE_CAPTION_MODEL）
     output_language = db.Column(db.String(10), nullable=False, default='zh')  # 输出语言偏好（zh, en, ja, auto）
-    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
-    updated_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    # 与其他模型一致：时间列均为 naive UTC（datetime.utcnow），不混用带时区的值
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def to_dict(self):
         """Convert to dictionary"""
@@ -57,8 +67,8 @@ class Settings(db.Model):
         - 首次创建时，用 Config（也就是 .env）里的值初始化，作为“系统默认值”
         - 之后所有读写都只走数据库，env 只影响初始化/重置逻辑
         """
-        settings = Settings.query.first()
-        if not settings:
+        settings = db.session.get(Settings, 1)
+        if settings is None:
             # 延迟导入，避免循环依赖
             from config import Config
 
@@ -71,7 +81,8 @@ class Settings(db.Model):
                 default_api_base = Config.GOOGLE_API_BASE or None
                 default_api_key = Config.GOOGLE_API_KEY or None
 
-            settings = Settings(
+            defaults = dict(
+                id=1,
                 ai_provider_format=Config.AI_PROVIDER_FORMAT,
                 api_base_url=default_api_base,
                 api_key=default_api_key,
@@ -86,10 +97,46 @@ class Settings(db.Model):
                 image_caption_model=Config.IMAGE_CAPTION_MODEL,
                 output_language='zh',  # 默认中文
             )
-            settings.id = 1
-            db.session.add(settings)
-            db.session.commit()
+
+            # 用 INSERT ... ON CONFLICT DO NOTHING 创建单例行：并发的首次请求不会因主键冲突报错
+            insert = _INSERT_BY_DIALECT.get(db.session.get_bind().dialect.name)
+            if insert is not None:
+                db.session.execute(
+                    insert(Settings).values(**defaults).on_conflict_do_nothing(index_elements=['id'])
+                )
+                db.session.commit()
+                settings = db.session.get(Settings, 1)
+            else:
+                settings = Settings(**defaults)
+                db.session.add(settings)
+                db.session.commit()
         return settings
 
     def __repr__(self):
         return f'<Settings id={self.id}>'
+
+
+# 会话中有 Settings 写入时的标记，提交成功后据此让 settings_cache 失效
+_SETTINGS_DIRTY_KEY = 'settings_cache_dirty'
+
+
+@event.listens_for(Settings, 'after_insert')
+@event.listens_for(Settings, 'after_update')
+@event.listens_for(Settings, 'after_delete')
+def _mark_settings_dirty(mapper, connection, target):
+    """Remember that this session wrote the settings row"""
+    object_session(target).info[_SETTINGS_DIRTY_KEY] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_settings_cache(session):
+    """Drop the cached settings snapshot once a settings write is committed"""
+    # 在提交之后而非 flush 时失效：否则其他线程可能在提交前把旧值重新缓存
+    if session.info.pop(_SETTINGS_DIRTY_KEY, False):
+        settings_cache.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_settings_dirty(session):
+    """A rolled back write leaves the committed settings unchanged"""
+    session.info.pop(_SETTINGS_DIRTY_KEY, None)
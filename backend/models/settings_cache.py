@@ -0,0 +1,55 @@
+"""
+Settings cache - process-local snapshot of the singleton Settings row
+
+Read-only callers use get_cached_settings() instead of Settings.get_settings(),
+so the settings row is read from the database once instead of on every request.
+The snapshot is invalidated automatically after any commit that writes the
+Settings row (see the session listeners in models/settings.py).
+"""
+import threading
+import time
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+
+# 快照最长有效期（秒）：多进程部署时，其他进程写入的设置最迟在此时间后生效
+SETTINGS_CACHE_TTL = 60
+
+_lock = threading.Lock()
+_cached: Optional[Tuple[float, Mapping]] = None  # (加载时间, 只读快照)
+_version = 0
+
+
+def get_cached_settings() -> Mapping:
+    """
+    Get a read-only snapshot of Settings.to_dict()
+
+    The snapshot is a plain mapping rather than an ORM instance, so it is safe
+    to share across threads and sessions.
+    """
+    global _cached
+    cached = _cached
+    if cached is not None and time.monotonic() - cached[0] < SETTINGS_CACHE_TTL:
+        return cached[1]
+
+    # 只允许一个线程回源加载，避免缓存失效瞬间的并发击穿
+    with _lock:
+        cached = _cached
+        if cached is not None and time.monotonic() - cached[0] < SETTINGS_CACHE_TTL:
+            return cached[1]
+
+        # 延迟导入，避免循环依赖
+        from .settings import Settings
+
+        version = _version
+        snapshot = MappingProxyType(Settings.get_settings().to_dict())
+        # 加载期间如有写入触发失效，则不缓存这份可能过期的快照
+        if version == _version:
+            _cached = (time.monotonic(), snapshot)
+        return snapshot
+
+
+def invalidate():
+    """Drop the cached snapshot; called after a commit that wrote Settings"""
+    global _cached, _version
+    _version += 1
+    _cached = None
@@ -11,6 +11,10 @@ class UserTemplate(db.Model):
     User Template model - represents a user-uploaded template
     """
     __tablename__ = 'user_templates'
+    __table_args__ = (
+        # 模板列表按创建时间倒序，id 作为同一时间的次序
+        db.Index('ix_user_templates_created_at_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     name = db.Column(db.String(200), nullable=True)  # Optional template name
@@ -24,7 +28,7 @@ class UserTemplate(db.Model):
         return {
             'template_id': self.id,
             'name': self.name,
-            'template_image_url': f'/files/user-templates/{self.id}/{self.file_path.split("/")[-1]}',
+            'template_image_url': f'/files/user-templates/{self.id}/{self.file_path.rpartition("/")[2]}',
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
         }
@@ -4,13 +4,18 @@ File Service - handles all file operations
 import os
 import uuid
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
+from flask import current_app
 from werkzeug.utils import secure_filename
 from PIL import Image
 from models import Project
 from models import db
 
 
+# 流式保存上传文件时每次读取的块大小
+_COPY_CHUNK_SIZE = 1 << 20
+
+
 class FileService:
     """Service for file management"""
     
@@ -268,7 +273,7 @@ class FileService:
         
         # 刷新数据库会话，确保获取最新数据
         db.session.expire_all()
-        project = Project.query.get(project_id)
+        project = db.session.get(Project, project_id)
         if project and project.template_image_path:
             # template_image_path 是相对路径，需要转换为绝对路径
             template_path = self.upload_folder / project.template_image_path
@@ -296,7 +301,7 @@ class FileService:
         templates_dir.mkdir(exist_ok=True, parents=True)
         return templates_dir
     
-    def save_user_template(self, file, template_id: str) -> str:
+    def save_user_template(self, file, template_id: str) -> Tuple[str, int]:
         """
         Save user template image file
         
@@ -305,7 +310,7 @@ class FileService:
             template_id: Template ID
         
         Returns:
-            Relative file path from upload folder
+            Tuple of (relative file path from upload folder, bytes written)
         """
         templates_dir = self._get_user_templates_dir()
         template_dir = templates_dir / template_id
@@ -317,10 +322,15 @@ class FileService:
         filename = f"template.{ext}"
         
         filepath = template_dir / filename
-        file.save(str(filepath))
-        
-        # Return relative path
-        return filepath.relative_to(self.upload_folder).as_posix()
+        # 边写边计数，保存与统计大小只需读一遍上传流
+        size = 0
+        with open(filepath, 'wb') as out:
+            while chunk := file.stream.read(_COPY_CHUNK_SIZE):
+                out.write(chunk)
+                size += len(chunk)
+        
+        # Return relative path and size
+        return filepath.relative_to(self.upload_folder).as_posix(), size
     
     def delete_user_template(self, template_id: str) -> bool:
         """
@@ -341,3 +351,19 @@ class FileService:
         
         return True
     
+
+
+def get_file_service() -> FileService:
+    """
+    Get the app-wide FileService for the current app's UPLOAD_FOLDER
+
+    The instance is kept in app.extensions['file_service'] so requests do not
+    construct a new service (and re-create UPLOAD_FOLDER) each time; it is
+    rebuilt if UPLOAD_FOLDER changes.
+    """
+    upload_folder = Path(current_app.config['UPLOAD_FOLDER'])
+    file_service = current_app.extensions.get('file_service')
+    if file_service is None or file_service.upload_folder != upload_folder:
+        file_service = FileService(upload_folder)
+        current_app.extensions['file_service'] = file_service
+    return file_service
@@ -11,6 +11,7 @@ from sqlalchemy import func
 from models import db, Task, Page, Material, PageImageVersion
 from utils import get_filtered_pages
 from pathlib import Path
+from config import Config
 
 logger = logging.getLogger(__name__)
 
@@ -57,6 +58,11 @@ class TaskManager:
         with self.lock:
             return task_id in self.active_tasks
     
+    def active_count(self) -> int:
+        """Number of submitted tasks that are queued or still running"""
+        with self.lock:
+            return len(self.active_tasks)
+    
     def shutdown(self):
         """Shutdown the executor"""
         self.executor.shutdown(wait=True)
@@ -65,6 +71,27 @@ class TaskManager:
 # Global task manager instance
 task_manager = TaskManager(max_workers=4)
 
+# Dedicated pool for reference file parsing, so slow MinerU calls cannot starve generation tasks
+parse_task_manager = TaskManager(max_workers=Config.MAX_PARSE_WORKERS)
+
+# 单线程清理队列：删除磁盘文件不阻塞请求线程
+cleanup_task_manager = TaskManager(max_workers=1)
+
+
+def delete_file_task(task_id: str, file_path: str):
+    """
+    Background task for removing an uploaded file from disk
+    
+    Args:
+        task_id: Task identifier (used only for tracking)
+        file_path: Absolute path of the file to delete
+    """
+    try:
+        Path(file_path).unlink(missing_ok=True)
+        logger.info(f"Deleted file from disk: {file_path}")
+    except Exception as e:
+        logger.warning(f"Failed to delete file from disk: {str(e)}")
+
 
 def save_image_with_version(image, project_id: str, page_id: str, file_service, 
                             page_obj=None, image_format: str = 'PNG') -> tuple[str, int]:
@@ -153,7 +180,7 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
     with app.app_context():
         try:
             # 重要：在后台线程开始时就获取task和设置状态
-            task = Task.query.get(task_id)
+            task = db.session.get(Task, task_id)
             if not task:
                 logger.error(f"Task {task_id} not found")
                 return
@@ -229,7 +256,7 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
                     db.session.expire_all()
                     
                     # Update page in database
-                    page = Page.query.get(page_id)
+                    page = db.session.get(Page, page_id)
                     if page:
                         if error:
                             page.status = 'FAILED'
@@ -242,14 +269,14 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
                         db.session.commit()
                     
                     # Update task progress
-                    task = Task.query.get(task_id)
+                    task = db.session.get(Task, task_id)
                     if task:
                         task.update_progress(completed=completed, failed=failed)
                         db.session.commit()
                         logger.info(f"Description Progress: {completed}/{len(pages)} pages completed")
             
             # Mark task as completed
-            task = Task.query.get(task_id)
+            task = db.session.get(Task, task_id)
             if task:
                 task.status = 'COMPLETED'
                 task.completed_at = datetime.utcnow()
@@ -258,7 +285,7 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
             
             # Update project status
             from models import Project
-            project = Project.query.get(project_id)
+            project = db.session.get(Project, project_id)
             if project and failed == 0:
                 project.status = 'DESCRIPTIONS_GENERATED'
                 db.session.commit()
@@ -266,7 +293,7 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
         
         except Exception as e:
             # Mark task as failed
-            task = Task.query.get(task_id)
+            task = db.session.get(Task, task_id)
             if task:
                 task.status = 'FAILED'
                 task.error_message = str(e)
@@ -297,7 +324,7 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
     with app.app_context():
         try:
             # Update task status to PROCESSING
-            task = Task.query.get(task_id)
+            task = db.session.get(Task, task_id)
             if not task:
                 return
             
@@ -333,7 +360,7 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
                     try:
                         logger.debug(f"Starting image generation for page {page_id}, index {page_index}")
                         # Get page from database in this thread
-                        page_obj = Page.query.get(page_id)
+                        page_obj = db.session.get(Page, page_id)
                         if not page_obj:
                             raise ValueError(f"Page {page_id} not found")
                         
@@ -428,7 +455,7 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
                     db.session.expire_all()
                     
                     # Update page in database (主要是为了更新失败状态)
-                    page = Page.query.get(page_id)
+                    page = db.session.get(Page, page_id)
                     if page:
                         if error:
                             page.status = 'FAILED'
@@ -441,14 +468,14 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
                             db.session.refresh(page)
                     
                     # Update task progress
-                    task = Task.query.get(task_id)
+                    task = db.session.get(Task, task_id)
                     if task:
                         task.update_progress(completed=completed, failed=failed)
                         db.session.commit()
                         logger.info(f"Image Progress: {completed}/{len(pages)} pages completed")
             
             # Mark task as completed
-            task = Task.query.get(task_id)
+            task = db.session.get(Task, task_id)
             if task:
                 task.status = 'COMPLETED'
                 task.completed_at = datetime.utcnow()
@@ -457,7 +484,7 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
             
             # Update project status
             from models import Project
-            project = Project.query.get(project_id)
+            project = db.session.get(Project, project_id)
             if project and failed == 0:
                 project.status = 'COMPLETED'
                 db.session.commit()
@@ -465,7 +492,7 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
         
         except Exception as e:
             # Mark task as failed
-            task = Task.query.get(task_id)
+            task = db.session.get(Task, task_id)
             if task:
                 task.status = 'FAILED'
                 task.error_message = str(e)
@@ -490,7 +517,7 @@ def generate_single_page_image_task(task_id: str, project_id: str, page_id: str,
     with app.app_context():
         try:
             # Update task status to PROCESSING
-            task = Task.query.get(task_id)
+            task = db.session.get(Task, task_id)
             if not task:
                 return
             
@@ -498,7 +525,7 @@ def generate_single_page_image_task(task_id: str, project_id: str, page_id: str,
             db.session.commit()
             
             # Get page from database
-            page = Page.query.get(page_id)
+            page = db.session.get(Page, page_id)
             if not page or page.project_id != project_id:
                 raise ValueError(f"Page {page_id} not found")
             
@@ -584,7 +611,7 @@ def generate_single_page_image_task(task_id: str, project_id: str, page_id: str,
             logger.error(f"Task {task_id} FAILED: {error_detail}")
             
             # Mark task as failed
-            task = Task.query.get(task_id)
+            task = db.session.get(Task, task_id)
             if task:
                 task.status = 'FAILED'
                 task.error_message = str(e)
@@ -592,7 +619,7 @@ def generate_single_page_image_task(task_id: str, project_id: str, page_id: str,
                 db.session.commit()
             
             # Update page status
-            page = Page.query.get(page_id)
+            page = db.session.get(Page, page_id)
             if page:
                 page.status = 'FAILED'
                 db.session.commit()
@@ -615,7 +642,7 @@ def edit_page_image_task(task_id: str, project_id: str, page_id: str,
     with app.app_context():
         try:
             # Update task status to PROCESSING
-            task = Task.query.get(task_id)
+            task = db.session.get(Task, task_id)
             if not task:
                 return
             
@@ -623,7 +650,7 @@ def edit_page_image_task(task_id: str, project_id: str, page_id: str,
             db.session.commit()
             
             # Get page from database
-            page = Page.query.get(page_id)
+            page = db.session.get(Page, page_id)
             if not page or page.project_id != project_id:
                 raise ValueError(f"Page {page_id} not found")
             
@@ -691,7 +718,7 @@ def edit_page_image_task(task_id: str, project_id: str, page_id: str,
                     shutil.rmtree(temp_dir)
             
             # Mark task as failed
-            task = Task.query.get(task_id)
+            task = db.session.get(Task, task_id)
             if task:
                 task.status = 'FAILED'
                 task.error_message = str(e)
@@ -699,7 +726,7 @@ def edit_page_image_task(task_id: str, project_id: str, page_id: str,
                 db.session.commit()
             
             # Update page status
-            page = Page.query.get(page_id)
+            page = db.session.get(Page, page_id)
             if page:
                 page.status = 'FAILED'
                 db.session.commit()
@@ -726,7 +753,7 @@ def generate_material_image_task(task_id: str, project_id: str, prompt: str,
     with app.app_context():
         try:
             # Update task status to PROCESSING
-            task = Task.query.get(task_id)
+            task = db.session.get(Task, task_id)
             if not task:
                 return
             
@@ -786,7 +813,7 @@ def generate_material_image_task(task_id: str, project_id: str, prompt: str,
             logger.error(f"Task {task_id} FAILED: {error_detail}")
             
             # Mark task as failed
-            task = Task.query.get(task_id)
+            task = db.session.get(Task, task_id)
             if task:
                 task.status = 'FAILED'
                 task.error_message = str(e)
@@ -853,7 +880,7 @@ def export_editable_pptx_with_recursive_analysis_task(
         
         try:
             # Get project
-            project = Project.query.get(project_id)
+            project = db.session.get(Project, project_id)
             if not project:
                 raise ValueError(f'Project {project_id} not found')
             
@@ -875,7 +902,7 @@ def export_editable_pptx_with_recursive_analysis_task(
             logger.info(f"找到 {len(image_paths)} 张图片")
             
             # 初始化任务进度（包含消息日志）
-            task = Task.query.get(task_id)
+            task = db.session.get(Task, task_id)
             task.set_progress({
                 "total": 100,  # 使用百分比
                 "completed": 0,
@@ -902,7 +929,7 @@ def export_editable_pptx_with_recursive_analysis_task(
                         progress_messages = progress_messages[-max_messages:]
                     
                     # 更新数据库
-                    task = Task.query.get(task_id)
+                    task = db.session.get(Task, task_id)
                     if task:
                         task.set_progress({
                             "total": 100,
@@ -982,7 +1009,7 @@ def export_editable_pptx_with_recursive_analysis_task(
                 progress_messages.extend(warning_messages)
                 logger.warning(f"导出有 {len(warning_messages)} 条警告")
             
-            task = Task.query.get(task_id)
+            task = db.session.get(Task, task_id)
             if task:
                 task.status = 'COMPLETED'
                 task.completed_at = datetime.utcnow()
@@ -1009,7 +1036,7 @@ def export_editable_pptx_with_recursive_analysis_task(
             logger.error(f"✗ 任务 {task_id} 失败: {error_detail}")
             
             # 标记任务失败
-            task = Task.query.get(task_id)
+            task = db.session.get(Task, task_id)
             if task:
                 task.status = 'FAILED'
                 task.error_message = str(e)
@@ -2,6 +2,8 @@
 项目管理API单元测试
 """
 
+import io
+
 import pytest
 from conftest import assert_success_response, assert_error_response
 
@@ -122,3 +124,30 @@ class TestProjectDelete:
         
         assert response.status_code == 404
 
+
+
+class TestProjectTemplate:
+    """项目模板测试"""
+    
+    def test_reupload_template_touches_updated_at(self, client, sample_project, sample_image_file):
+        """测试相同扩展名重新上传模板时项目更新时间也会变化（前端据此刷新缓存）"""
+        if not sample_project:
+            pytest.skip("项目创建失败")
+        
+        project_id = sample_project['project_id']
+        png = sample_image_file.getvalue()
+        
+        def upload():
+            response = client.post(
+                f'/api/projects/{project_id}/template',
+                data={'template_image': (io.BytesIO(png), 'template.png')},
+                content_type='multipart/form-data'
+            )
+            assert_success_response(response)
+            return assert_success_response(client.get(f'/api/projects/{project_id}'))['data']['updated_at']
+        
+        first = upload()
+        second = upload()
+        assert second > first
+        
+        client.delete(f'/api/projects/{project_id}')
@@ -0,0 +1,294 @@
+"""
+参考文件API单元测试
+"""
+
+import io
+import json
+from pathlib import Path
+
+import pytest
+from conftest import assert_success_response, assert_error_response
+
+from models import db, ReferenceFile
+from services.task_manager import parse_task_manager, cleanup_task_manager
+
+
+def _upload(client, content: bytes, filename: str = 'notes.txt'):
+    """上传一个参考文件并返回文件信息"""
+    response = client.post(
+        '/api/reference-files/upload',
+        data={'file': (io.BytesIO(content), filename)},
+        content_type='multipart/form-data'
+    )
+    return assert_success_response(response)['data']['file']
+
+
+def _set_parse_status(file_id: str, status: str):
+    """直接修改数据库中的解析状态，模拟后台解析任务"""
+    reference_file = db.session.get(ReferenceFile, file_id)
+    reference_file.parse_status = status
+    db.session.commit()
+
+
+def _read_events(response):
+    """把 SSE 响应体解析为 (event, data) 列表，忽略保活注释"""
+    events = []
+    for block in response.get_data(as_text=True).split('\n\n'):
+        lines = [line for line in block.splitlines() if line and not line.startswith(':')]
+        if not lines:
+            continue
+        fields = dict(line.split(': ', 1) for line in lines)
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+class TestParseEvents:
+    """解析状态 SSE 测试"""
+
+    def test_pending_file_closes_after_first_event(self, client):
+        """测试未触发解析的文件只推送一次状态后即关闭连接"""
+        file = _upload(client, b'sse pending')
+
+        response = client.get(f"/api/reference-files/{file['id']}/events")
+
+        assert response.mimetype == 'text/event-stream'
+        events = _read_events(response)
+        assert events == [('status', events[0][1])]
+        assert events[0][1]['parse_status'] == 'pending'
+
+    def test_completed_file_closes_after_first_event(self, client):
+        """测试已完成解析的文件推送最终状态后关闭连接"""
+        file = _upload(client, b'sse completed')
+        _set_parse_status(file['id'], 'completed')
+
+        events = _read_events(client.get(f"/api/reference-files/{file['id']}/events"))
+
+        assert [event for event, _ in events] == ['status']
+        assert events[0][1]['parse_status'] == 'completed'
+
+    def test_parsing_stream_ends_after_max_lifetime(self, client, monkeypatch):
+        """测试解析一直未结束时，连接在最长存活时间后关闭"""
+        monkeypatch.setattr('controllers.reference_file_controller._SSE_MAX_LIFETIME', 0.05)
+        monkeypatch.setattr('controllers.reference_file_controller._SSE_RECHECK_INTERVAL', 0.01)
+        file = _upload(client, b'sse parsing')
+        _set_parse_status(file['id'], 'parsing')
+
+        events = _read_events(client.get(f"/api/reference-files/{file['id']}/events"))
+
+        assert [event for event, _ in events] == ['status']
+        assert events[0][1]['parse_status'] == 'parsing'
+
+    def test_missing_file_returns_404(self, client):
+        """测试订阅不存在的文件返回404"""
+        response = client.get('/api/reference-files/non-existent-id/events')
+
+        assert response.status_code == 404
+
+
+class TestTriggerParse:
+    """触发解析测试"""
+
+    def test_submit_failure_marks_file_failed(self, client, monkeypatch):
+        """测试提交解析任务失败时状态回退为failed，之后可以重新触发"""
+        file = _upload(client, b'parse submit failure')
+
+        def fail_submit(*args, **kwargs):
+            raise RuntimeError('cannot schedule new futures after shutdown')
+
+        monkeypatch.setattr(parse_task_manager, 'submit_task', fail_submit)
+        response = client.post(f"/api/reference-files/{file['id']}/parse")
+
+        assert response.status_code == 500
+        reference_file = db.session.get(ReferenceFile, file['id'])
+        assert reference_file.parse_status == 'failed'
+        assert 'cannot schedule new futures' in reference_file.error_message
+
+        submitted = []
+        monkeypatch.setattr(parse_task_manager, 'submit_task', lambda *args: submitted.append(args))
+        data = assert_success_response(client.post(f"/api/reference-files/{file['id']}/parse"))
+
+        assert data['data']['message'] == 'Parsing started'
+        assert data['data']['file']['parse_status'] == 'parsing'
+        assert len(submitted) == 1
+
+    def test_rejects_when_parse_queue_full(self, client, app, monkeypatch):
+        """测试解析队列已满时返回429且不提交任务、不修改状态"""
+        file = _upload(client, b'parse queue full')
+        submitted = []
+        monkeypatch.setattr(parse_task_manager, 'submit_task', lambda *args: submitted.append(args))
+        monkeypatch.setattr(
+            parse_task_manager, 'active_count', lambda: app.config['MAX_PENDING_PARSE_TASKS']
+        )
+
+        response = client.post(f"/api/reference-files/{file['id']}/parse")
+
+        data = assert_error_response(response, 429)
+        assert data['error']['code'] == 'RATE_LIMIT_EXCEEDED'
+        assert submitted == []
+        assert db.session.get(ReferenceFile, file['id']).parse_status == 'pending'
+
+        monkeypatch.setattr(parse_task_manager, 'active_count', lambda: 0)
+        assert_success_response(client.post(f"/api/reference-files/{file['id']}/parse"))
+        assert len(submitted) == 1
+
+
+class TestDeleteSharedFile:
+    """内容相同的上传共用磁盘文件的删除测试"""
+
+    @pytest.fixture(autouse=True)
+    def run_cleanup_inline(self, monkeypatch):
+        """后台删除任务改为同步执行，便于断言磁盘状态"""
+        monkeypatch.setattr(
+            cleanup_task_manager, 'submit_task',
+            lambda task_id, func, *args: func(task_id, *args)
+        )
+
+    def _stored_path(self, app, file_id):
+        reference_file = db.session.get(ReferenceFile, file_id)
+        return Path(app.config['UPLOAD_FOLDER']) / reference_file.file_path
+
+    def test_file_removed_only_after_last_reference(self, client, app):
+        """测试删除一条记录后文件仍保留，删除最后一条记录后文件被移除"""
+        first = _upload(client, b'shared content', 'a.txt')
+        second = _upload(client, b'shared content', 'b.txt')
+        stored_path = self._stored_path(app, first['id'])
+        assert stored_path == self._stored_path(app, second['id'])
+        assert stored_path.exists()
+
+        assert_success_response(client.delete(f"/api/reference-files/{first['id']}"))
+        assert stored_path.exists()
+
+        assert_success_response(client.delete(f"/api/reference-files/{second['id']}"))
+        assert not stored_path.exists()
+
+    def test_reupload_after_delete_restores_file(self, client, app):
+        """测试文件被删除后再次上传相同内容会重新写入文件"""
+        file = _upload(client, b'reuploaded content')
+        stored_path = self._stored_path(app, file['id'])
+        assert_success_response(client.delete(f"/api/reference-files/{file['id']}"))
+        assert not stored_path.exists()
+
+        file = _upload(client, b'reuploaded content')
+
+        assert self._stored_path(app, file['id']) == stored_path
+        assert stored_path.read_bytes() == b'reuploaded content'
+
+
+class TestGetReferenceFileETag:
+    """参考文件详情 ETag 测试"""
+
+    def _get(self, client, file_id, etag=None):
+        headers = {'If-None-Match': etag} if etag else {}
+        return client.get(f'/api/reference-files/{file_id}', headers=headers)
+
+    def test_unchanged_file_returns_304(self, client):
+        """测试内容未变化时携带ETag请求返回304且无响应体"""
+        file = _upload(client, b'etag unchanged')
+        response = self._get(client, file['id'])
+        assert_success_response(response)
+        etag = response.headers['ETag']
+        assert etag.startswith('W/')
+
+        response = self._get(client, file['id'], etag)
+
+        assert response.status_code == 304
+        assert response.headers['ETag'] == etag
+        assert response.get_data() == b''
+
+    def test_parse_status_change_invalidates_etag(self, client):
+        """测试解析状态变化后旧ETag失效"""
+        file = _upload(client, b'etag parse')
+        etag = self._get(client, file['id']).headers['ETag']
+
+        _set_parse_status(file['id'], 'completed')
+        response = self._get(client, file['id'], etag)
+
+        data = assert_success_response(response)
+        assert data['data']['file']['parse_status'] == 'completed'
+        assert response.headers['ETag'] != etag
+
+    def test_project_association_invalidates_etag(self, client, sample_project):
+        """测试关联或取消关联项目后旧ETag失效"""
+        if not sample_project:
+            pytest.skip("项目创建失败")
+
+        file = _upload(client, b'etag associate')
+        etag = self._get(client, file['id']).headers['ETag']
+
+        assert_success_response(client.post(
+            f"/api/reference-files/{file['id']}/associate",
+            json={'project_id': sample_project['project_id']}
+        ))
+        response = self._get(client, file['id'], etag)
+        data = assert_success_response(response)
+        assert data['data']['file']['project_id'] == sample_project['project_id']
+        etag = response.headers['ETag']
+
+        assert_success_response(client.post(f"/api/reference-files/{file['id']}/dissociate"))
+        response = self._get(client, file['id'], etag)
+        data = assert_success_response(response)
+        assert data['data']['file']['project_id'] is None
+
+
+class TestListReferenceFiles:
+    """参考文件列表分页测试"""
+
+    def _list(self, client, **params):
+        return client.get('/api/reference-files/project/global', query_string=params)
+
+    def test_without_paging_returns_all(self, client):
+        """测试不传分页参数时返回全部文件且没有next_cursor"""
+        for i in range(3):
+            _upload(client, f'list all {i}'.encode())
+
+        data = assert_success_response(self._list(client))
+
+        assert len(data['data']['files']) == 3
+        assert 'next_cursor' not in data['data']
+
+    def test_cursor_walks_all_pages(self, client):
+        """测试按游标翻页可以不重不漏地取完全部文件，最后一页没有next_cursor"""
+        ids = sorted(_upload(client, f'list page {i}'.encode())['id'] for i in range(5))
+
+        pages = []
+        cursor = None
+        while True:
+            params = {'limit': 2}
+            if cursor:
+                params['after'] = cursor
+            data = assert_success_response(self._list(client, **params))['data']
+            pages.append([f['id'] for f in data['files']])
+            cursor = data['next_cursor']
+            if cursor is None:
+                break
+
+        assert pages == [ids[0:2], ids[2:4], ids[4:5]]
+
+    def test_exact_multiple_has_no_empty_page(self, client):
+        """测试总数恰好是limit整数倍时最后一页直接返回next_cursor为None"""
+        ids = sorted(_upload(client, f'list exact {i}'.encode())['id'] for i in range(4))
+
+        first = assert_success_response(self._list(client, limit=2))['data']
+        second = assert_success_response(self._list(client, limit=2, after=first['next_cursor']))['data']
+
+        assert [f['id'] for f in first['files']] == ids[:2]
+        assert [f['id'] for f in second['files']] == ids[2:]
+        assert second['next_cursor'] is None
+
+    @pytest.mark.parametrize('limit', ['abc', '0', '-1'])
+    def test_invalid_limit_rejected(self, client, limit):
+        """测试非法的limit返回400"""
+        response = self._list(client, limit=limit)
+
+        assert response.status_code == 400
+
+    def test_limit_capped(self, client, monkeypatch):
+        """测试limit超过上限时按上限返回"""
+        monkeypatch.setattr('controllers.reference_file_controller._MAX_PAGE_SIZE', 2)
+        for i in range(3):
+            _upload(client, f'list cap {i}'.encode())
+
+        data = assert_success_response(self._list(client, limit=100))['data']
+
+        assert len(data['files']) == 2
+        assert data['next_cursor'] == data['files'][-1]['id']
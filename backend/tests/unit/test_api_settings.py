@@ -0,0 +1,69 @@
+"""
+设置API单元测试
+"""
+
+import pytest
+from conftest import assert_success_response, assert_error_response
+
+
+@pytest.fixture
+def reset_settings(client):
+    """测试结束后恢复默认设置，避免影响其他测试"""
+    yield
+    client.post('/api/settings/reset')
+
+
+class TestSettingsUpdate:
+    """设置更新测试"""
+
+    def test_update_trims_optional_fields(self, client, reset_settings):
+        """测试可选字段去除空白，空字符串表示清除覆盖"""
+        response = client.put('/api/settings', json={
+            'text_model': '  my-model  ',
+            'image_model': '',
+            'max_description_workers': '7',
+        })
+
+        data = assert_success_response(response)
+        assert data['data']['text_model'] == 'my-model'
+        assert data['data']['image_model'] is None
+        assert data['data']['max_description_workers'] == 7
+
+    def test_update_rejects_invalid_choice(self, client, reset_settings):
+        """测试非法的枚举值返回400"""
+        response = client.put('/api/settings', json={'image_resolution': '8K'})
+
+        data = assert_error_response(response, 400)
+        assert data['error']['message'] == 'Resolution must be 1K, 2K, or 4K'
+
+    def test_update_rejects_invalid_worker_count(self, client, reset_settings):
+        """测试超出范围或非数字的线程数返回400"""
+        assert_error_response(client.put('/api/settings', json={'max_image_workers': 30}), 400)
+        assert_error_response(client.put('/api/settings', json={'max_image_workers': 'abc'}), 400)
+
+    def test_update_visible_in_get(self, client, reset_settings):
+        """测试更新后立即可以读到新值（读缓存已失效）"""
+        client.get('/api/settings')
+        client.put('/api/settings', json={'output_language': 'ja'})
+
+        data = assert_success_response(client.get('/api/settings'))
+        assert data['data']['output_language'] == 'ja'
+        assert client.get('/api/output-language').get_json()['data']['language'] == 'ja'
+
+    def test_update_rejects_malformed_json(self, client, reset_settings):
+        """测试无法解析的请求体返回400而不是500"""
+        response = client.put('/api/settings', data='{not json', content_type='application/json')
+
+        assert_error_response(response, 400)
+
+    def test_direct_model_write_invalidates_cache(self, app, client, reset_settings):
+        """测试不经过设置接口直接提交 Settings 修改，读缓存也会失效"""
+        from models import db, Settings
+
+        client.get('/api/settings')
+        with app.app_context():
+            Settings.get_settings().output_language = 'en'
+            db.session.commit()
+
+        data = assert_success_response(client.get('/api/settings'))
+        assert data['data']['output_language'] == 'en'
@@ -0,0 +1,79 @@
+"""
+用户模板API单元测试
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from conftest import assert_success_response, assert_error_response
+
+from models import db, UserTemplate
+
+
+@pytest.fixture
+def template_ids(client):
+    """直接写入5个创建时间递增的模板，返回按列表顺序（最新在前）排列的id"""
+    base = datetime(2026, 1, 1)
+    templates = [
+        UserTemplate(file_path=f'user-templates/t{i}/template.png', created_at=base + timedelta(minutes=i))
+        for i in range(5)
+    ]
+    db.session.add_all(templates)
+    db.session.commit()
+    return [template.id for template in reversed(templates)]
+
+
+def _list(client, **params):
+    return client.get('/api/user-templates', query_string=params)
+
+
+class TestListUserTemplates:
+    """用户模板列表分页测试"""
+
+    def test_without_paging_returns_all(self, client, template_ids):
+        """测试不传分页参数时返回全部模板且没有next_cursor"""
+        data = assert_success_response(_list(client))['data']
+
+        assert [t['template_id'] for t in data['templates']] == template_ids
+        assert 'next_cursor' not in data
+
+    def test_cursor_walks_all_pages(self, client, template_ids):
+        """测试按游标翻页按创建时间倒序取完全部模板，最后一页没有next_cursor"""
+        pages = []
+        cursor = None
+        while True:
+            params = {'limit': 2}
+            if cursor:
+                params['cursor'] = cursor
+            data = assert_success_response(_list(client, **params))['data']
+            pages.append([t['template_id'] for t in data['templates']])
+            cursor = data['next_cursor']
+            if cursor is None:
+                break
+
+        assert pages == [template_ids[0:2], template_ids[2:4], template_ids[4:5]]
+
+    def test_exact_multiple_has_no_empty_page(self, client, template_ids):
+        """测试总数恰好是limit整数倍时最后一页直接返回next_cursor为None"""
+        data = assert_success_response(_list(client, limit=5))['data']
+
+        assert len(data['templates']) == 5
+        assert data['next_cursor'] is None
+
+    @pytest.mark.parametrize('cursor', [
+        'not-a-date|abc',
+        '2026-01-01T00:03:00',
+        '2026-01-01T00:03:00|',
+    ])
+    def test_invalid_cursor_rejected(self, client, template_ids, cursor):
+        """测试格式错误、缺少分隔符或id的游标返回400"""
+        response = _list(client, limit=2, cursor=cursor)
+
+        assert_error_response(response, 400)
+
+    @pytest.mark.parametrize('limit', ['abc', '0'])
+    def test_invalid_limit_rejected(self, client, limit):
+        """测试非法的limit返回400"""
+        response = _list(client, limit=limit)
+
+        assert_error_response(response, 400)
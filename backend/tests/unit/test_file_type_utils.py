@@ -0,0 +1,94 @@
+"""
+文件类型嗅探单元测试
+"""
+
+import io
+import zipfile
+
+from utils.file_type_utils import sniff_file_kind, verify_file_signature
+
+
+def _make_ooxml(part_name: str) -> io.BytesIO:
+    """构造一个只包含指定部件的最小 OOXML（ZIP）文件"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('[Content_Types].xml', '<Types/>')
+        archive.writestr(part_name, '<root/>')
+    buffer.seek(0)
+    return buffer
+
+
+class TestSniffFileKind:
+    """文件头识别测试"""
+
+    def test_pdf_header(self):
+        assert sniff_file_kind(b'%PDF-1.7\n...') == 'pdf'
+
+    def test_zip_header(self):
+        assert sniff_file_kind(b'PK\x03\x04\x14\x00') == 'zip'
+
+    def test_ole2_header(self):
+        assert sniff_file_kind(b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1\x00\x00') == 'ole2'
+
+    def test_plain_text(self):
+        assert sniff_file_kind('# 标题\n正文'.encode('utf-8')) == 'text'
+
+    def test_text_mentioning_pdf_magic(self):
+        assert sniff_file_kind(b'# Notes\nPDF files start with %PDF-1.7\n') == 'text'
+
+    def test_binary_garbage(self):
+        assert sniff_file_kind(b'\x89PNG\r\n\x1a\n\x00\x00') is None
+
+    def test_empty_header(self):
+        assert sniff_file_kind(b'') is None
+
+
+class TestVerifyFileSignature:
+    """扩展名与内容一致性校验测试"""
+
+    def test_docx_matches(self):
+        stream = _make_ooxml('word/document.xml')
+        assert verify_file_signature(stream, 'docx') is True
+        # 校验后流位置应被恢复
+        assert stream.tell() == 0
+
+    def test_pptx_renamed_as_docx_rejected(self):
+        stream = _make_ooxml('ppt/presentation.xml')
+        assert verify_file_signature(stream, 'docx') is False
+        assert verify_file_signature(stream, 'pptx') is True
+
+    def test_pdf_renamed_as_txt_rejected(self):
+        stream = io.BytesIO(b'%PDF-1.4\n%binary')
+        assert verify_file_signature(stream, 'txt') is False
+        assert verify_file_signature(stream, 'pdf') is True
+
+    def test_csv_accepted(self):
+        stream = io.BytesIO(b'name,value\na,1\n')
+        assert verify_file_signature(stream, 'csv') is True
+
+    def test_empty_text_file_accepted(self):
+        for extension in ('txt', 'md', 'csv'):
+            assert verify_file_signature(io.BytesIO(b''), extension) is True
+
+    def test_empty_binary_file_rejected(self):
+        for extension in ('pdf', 'docx', 'xls'):
+            assert verify_file_signature(io.BytesIO(b''), extension) is False
+
+    def test_pdf_header_beyond_limit_rejected(self):
+        stream = io.BytesIO(b'\x00' * 1024 + b'%PDF-1.4\n')
+        assert verify_file_signature(stream, 'pdf') is False
+
+    def test_text_mentioning_pdf_magic_accepted(self):
+        for extension in ('md', 'txt', 'csv'):
+            stream = io.BytesIO(b'# Notes\nEvery PDF starts with %PDF-1.7, see the spec.\n')
+            assert verify_file_signature(stream, extension) is True
+
+    def test_legacy_office_text_formats_accepted(self):
+        # Word 另存为 .doc 的 RTF、Excel 另存为 .xls 的 HTML
+        assert verify_file_signature(io.BytesIO(b'{\\rtf1\\ansi Hello}'), 'doc') is True
+        assert verify_file_signature(io.BytesIO(b'<html><table><tr><td>1</td></tr></table></html>'), 'xls') is True
+
+    def test_pdf_with_leading_junk_accepted(self):
+        stream = io.BytesIO(b'\xef\xbb\xbf\r\n\x00' + b'%PDF-1.7\n%binary')
+        assert verify_file_signature(stream, 'pdf') is True
+        assert verify_file_signature(stream, 'txt') is False
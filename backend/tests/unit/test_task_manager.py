@@ -0,0 +1,30 @@
+"""
+后台任务管理器单元测试
+"""
+
+import threading
+
+from services.task_manager import TaskManager
+
+
+class TestActiveCount:
+    """排队与运行中任务计数测试"""
+
+    def test_counts_queued_and_running_tasks(self):
+        """测试运行中和排队中的任务都计入，结束后移除"""
+        manager = TaskManager(max_workers=1)
+        release = threading.Event()
+        try:
+            assert manager.active_count() == 0
+
+            manager.submit_task('running', lambda task_id: release.wait(5))
+            manager.submit_task('queued', lambda task_id: None)
+            assert manager.active_count() == 2
+            assert manager.is_task_active('queued')
+
+            release.set()
+            manager.shutdown()
+            assert manager.active_count() == 0
+        finally:
+            release.set()
+            manager.shutdown()
@@ -0,0 +1,27 @@
+"""
+Database utilities - session helpers shared by controllers
+"""
+from contextlib import contextmanager
+from sqlalchemy.orm import scoped_session
+
+
+@contextmanager
+def no_expire_on_commit(session):
+    """
+    Temporarily disable expire_on_commit on a session.
+
+    Use around a commit whose objects are serialized right afterwards, so
+    to_dict() reads the values already in memory instead of reloading each row.
+
+    Args:
+        session: SQLAlchemy session or scoped session (e.g. db.session)
+    """
+    # scoped_session 只是代理，需要取到当前线程实际的 Session
+    if isinstance(session, scoped_session):
+        session = session()
+    original = session.expire_on_commit
+    session.expire_on_commit = False
+    try:
+        yield session
+    finally:
+        session.expire_on_commit = original
@@ -0,0 +1,135 @@
+"""
+File type utilities - verify uploaded content against its claimed extension
+
+Only the first kilobyte is inspected, so malformed or disguised
+uploads can be rejected before the full body is written to disk.
+"""
+import zipfile
+from typing import BinaryIO, Optional
+
+# Number of leading bytes needed to identify every supported format
+SNIFF_HEADER_SIZE = 1024
+
+# PDF readers accept the header anywhere within the first 1024 bytes, not only at offset 0
+_PDF_MAGIC = b'%PDF-'
+
+# Magic-number signatures, listed from the most to the least common upload format
+_SIGNATURES = (
+    (_PDF_MAGIC, 'pdf'),
+    (b'PK\x03\x04', 'zip'),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'ole2'),
+    (b'\xff\xfe', 'text'),  # UTF-16 LE BOM
+    (b'\xfe\xff', 'text'),  # UTF-16 BE BOM
+)
+
+# Plain text formats, the only ones that may be empty
+_PLAIN_TEXT_EXTENSIONS = {'txt', 'md', 'csv'}
+
+# Extensions that may legitimately carry each detected container kind
+_KIND_EXTENSIONS = {
+    'pdf': {'pdf'},
+    'zip': {'docx', 'pptx', 'xlsx'},
+    'ole2': {'doc', 'ppt', 'xls'},
+    # Word/Excel also save RTF, HTML and XML spreadsheets under the legacy .doc/.xls extensions
+    'text': _PLAIN_TEXT_EXTENSIONS | {'doc', 'xls'},
+}
+
+# Top-level folder that identifies each OOXML document type inside the ZIP container
+_OOXML_PART_PREFIXES = {
+    'docx': 'word/',
+    'pptx': 'ppt/',
+    'xlsx': 'xl/',
+}
+
+# Trie leaf marker (bytes are ints, so None never collides with a child key)
+_KIND = None
+
+
+def _build_signature_trie(signatures) -> dict:
+    """Build a byte-level prefix trie so all signatures are matched in one header pass"""
+    trie = {}
+    for magic, kind in signatures:
+        node = trie
+        for byte in magic:
+            node = node.setdefault(byte, {})
+        node[_KIND] = kind
+    return trie
+
+
+_SIGNATURE_TRIE = _build_signature_trie(_SIGNATURES)
+
+
+def sniff_file_kind(header: bytes) -> Optional[str]:
+    """
+    Identify the container kind of a file from its leading bytes
+
+    Args:
+        header: Leading bytes of the file (SNIFF_HEADER_SIZE is enough)
+
+    Returns:
+        'pdf', 'zip', 'ole2' or 'text', or None if the content is not recognized
+    """
+    if not header:
+        return None
+
+    node = _SIGNATURE_TRIE
+    for byte in header:
+        node = node.get(byte)
+        if node is None:
+            break
+        if _KIND in node:
+            return node[_KIND]
+
+    # Plain text formats have no magic number; binary content almost always contains NUL bytes
+    if b'\x00' not in header:
+        return 'text'
+    return None
+
+
+def _probe_ooxml_type(stream: BinaryIO) -> Optional[str]:
+    """Read the ZIP central directory to tell DOCX/PPTX/XLSX apart"""
+    try:
+        with zipfile.ZipFile(stream) as archive:
+            names = archive.namelist()
+    except (zipfile.BadZipFile, zipfile.LargeZipFile, ValueError, EOFError, OSError, KeyError):
+        # 截断或构造异常的 ZIP 可能抛出多种异常，统一视为无法识别
+        return None
+
+    for ext, prefix in _OOXML_PART_PREFIXES.items():
+        if any(name.startswith(prefix) for name in names):
+            return ext
+    return None
+
+
+def verify_file_signature(stream: BinaryIO, extension: str) -> bool:
+    """
+    Check that a seekable stream's content matches the claimed file extension
+
+    The stream position is restored before returning.
+
+    Args:
+        stream: Seekable binary stream of the uploaded file
+        extension: Lower-case file extension without the dot
+
+    Returns:
+        True if the content is consistent with the extension
+    """
+    position = stream.tell()
+    try:
+        header = stream.read(SNIFF_HEADER_SIZE)
+        # 空文件没有可识别的内容，只有纯文本格式允许为空
+        if not header:
+            return extension in _PLAIN_TEXT_EXTENSIONS
+        # 部分生成器会在 PDF 头之前写入少量前导字节；只对声明为 PDF 的文件按偏移查找，
+        # 以免正文中提到 %PDF- 的文本文件被误判
+        if extension == 'pdf' and _PDF_MAGIC in header:
+            return True
+        kind = sniff_file_kind(header)
+        if kind is None or extension not in _KIND_EXTENSIONS[kind]:
+            return False
+        if kind == 'zip':
+            stream.seek(position)
+            return _probe_ooxml_type(stream) == extension
+        return True
+    finally:
+        stream.seek(position)